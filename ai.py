@@ -1,6 +1,18 @@
+import ctypes
+import os
 import random
-from collections import deque
-from copy import deepcopy
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing.sharedctypes import RawArray
+from typing import NamedTuple
+
+from board import (
+    BOARD_SIZE, CELL_POS, WALL_SLOTS, Game,
+    cell_index, flood_distance, get_valid_moves, legal_walls,
+    pawn_move_cells, path_wall_mask, wall_bit,
+)
 
 # ─────────────────────────────────────────────
 #  AI BASE CLASS
@@ -12,6 +24,32 @@ class QuoridorAI:
     def __init__(self, player_index, difficulty="medium"):
         self.player_index = player_index
         self.difficulty = difficulty.lower()
+        # Search memory for the hard AI; unused while HARD_WORKERS > 1, as
+        # the worker processes share _shared_slots instead
+        self.tt = TranspositionTable()
+        self._pool = None  # Worker processes of the parallel search
+        self._shared_slots = None  # The workers' shared transposition table
+        if self.difficulty == "hard" and HARD_WORKERS > 1:
+            self._start_pool()
+    
+    def reset(self):
+        """
+        Forgets everything searched so far, as for a new game. The worker
+        processes are kept, so a reused AI doesn't pay their start-up again.
+        """
+        self.tt = TranspositionTable()
+        if self._shared_slots is not None:
+            ctypes.memset(self._shared_slots, 0, ctypes.sizeof(self._shared_slots))
+    
+    def close(self):
+        """
+        Stops the worker processes once their current search is done. The
+        AI can still be used; its next parallel search starts new ones.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+            self._shared_slots = None
         
     def get_move(self, game_state):
         """
@@ -36,39 +74,27 @@ class QuoridorAI:
 
 def get_shortest_path_length(game_state, player_index):
     """BFS to find shortest path to goal for a player."""
-    from board import has_path_to_goal, get_valid_moves, BOARD_SIZE
-    
     player = game_state.players[player_index]
-    start = player.pos
-    goal_row = player.goal_row
-    
-    visited = set([start])
-    queue = deque([(start, 0)])  # (position, distance)
-    
-    while queue:
-        (x, y), dist = queue.popleft()
-        
-        if y == goal_row:
-            return dist
-        
-        # Get valid moves from current position
-        directions = [(1,0), (-1,0), (0,1), (0,-1)]
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if (nx, ny) in visited:
-                continue
-            if not (0 <= nx < BOARD_SIZE and 0 <= ny < BOARD_SIZE):
-                continue
-            
-            # Check wall blocking
-            from board import wall_blocks_move
-            if wall_blocks_move(game_state.walls, (x, y), (nx, ny)):
-                continue
-            
-            visited.add((nx, ny))
-            queue.append(((nx, ny), dist + 1))
-    
-    return float('inf')  # No path found
+    return _path_length(
+        game_state.h_walls, game_state.v_walls,
+        cell_index(*player.pos), player.goal_row,
+    )
+
+
+PATH_CACHE_SIZE = 200000
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def _path_length(h_walls, v_walls, cell, goal_row):
+    """
+    Shortest path length from a cell, float('inf') if the goal is cut off.
+    Cached: search trees reach the same walls and cell through different
+    move orders, and both players' paths are re-scored at every leaf.
+    """
+    dist = flood_distance(h_walls, v_walls, cell, goal_row)
+    if dist < 0:
+        return float('inf')  # No path found
+    return dist
 
 
 def evaluate_position(game_state, player_index):
@@ -85,20 +111,97 @@ def evaluate_position(game_state, player_index):
 
 def get_all_valid_wall_placements(game_state, player_index):
     """Returns all valid wall placements for a player."""
-    from board import is_valid_wall_placement, BOARD_SIZE
-    
     player = game_state.players[player_index]
     if player.walls_left <= 0:
         return []
     
-    valid_walls = []
-    for x in range(BOARD_SIZE - 1):
-        for y in range(BOARD_SIZE - 1):
-            for orientation in ["H", "V"]:
-                if is_valid_wall_placement(game_state, x, y, orientation):
-                    valid_walls.append((x, y, orientation))
+    return list(_valid_walls_for(game_state.h_walls, game_state.v_walls, _pack_pawns(game_state)))
+
+
+def _pack_pawns(game_state):
+    """((cell, goal_row), (cell, goal_row)) for both players."""
+    return tuple((cell_index(*p.pos), p.goal_row) for p in game_state.players)
+
+
+@lru_cache(maxsize=4096)
+def _valid_walls_for(h_walls, v_walls, pawns):
+    """
+    Cached wall enumeration. Legality only depends on the wall bitboards
+    and the pawns' (cell, goal_row), so those make up the key.
+    """
+    return tuple(legal_walls(h_walls, v_walls, pawns))
+
+
+@lru_cache(maxsize=4096)
+def _rank_walls(h_walls, v_walls, opp, opp_goal, pawns):
+    """
+    Splits the legal walls into (ranked, others): walls across the
+    opponent's current shortest path, longest resulting path first, and
+    the rest, which cannot lengthen it. Cached, as a search tree ranks
+    the same position for every move order that reaches it.
+    """
+    # Only a wall across the opponent's current shortest path can
+    # lengthen it, so only those need a BFS to be scored
+    on_path = path_wall_mask(h_walls, v_walls, opp, opp_goal) or 0
+    on_path_h, on_path_v = on_path, on_path >> WALL_SLOTS
+    
+    scored, others = [], []
+    for x, y, orientation in _valid_walls_for(h_walls, v_walls, pawns):
+        bit = wall_bit(x, y)
+        if orientation == "H" and on_path_h & bit:
+            score = _path_length(h_walls | bit, v_walls, opp, opp_goal)
+        elif orientation == "V" and on_path_v & bit:
+            score = _path_length(h_walls, v_walls | bit, opp, opp_goal)
+        else:
+            others.append((x, y, orientation))
+            continue
+        scored.append((score, (x, y, orientation)))
     
-    return valid_walls
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return tuple(wall for _, wall in scored), tuple(others)
+
+
+def _shortlist_walls(h_walls, v_walls, opp, opp_goal, pawns, count):
+    """
+    Picks up to `count` legal walls worth trying against the opponent on
+    cell `opp`: the best of _rank_walls first, then a random sample of
+    the rest fills any remaining slots. `pawns` is as for legal_walls.
+    """
+    ranked, others = _rank_walls(h_walls, v_walls, opp, opp_goal, pawns)
+    walls = list(ranked[:count])
+    missing = count - len(walls)
+    if missing > 0:
+        walls.extend(random.sample(others, min(missing, len(others))))
+    return walls
+
+
+class SearchState(NamedTuple):
+    """
+    Immutable snapshot of a position for search: both wall bitboards,
+    both pawn cells and both wall counts. Trying a move builds a new
+    state instead of mutating and undoing a GameState.
+    """
+    h_walls: int
+    v_walls: int
+    pos0: int
+    pos1: int
+    walls0: int
+    walls1: int
+
+
+def _pack_state(game_state):
+    """SearchState of a GameState."""
+    p0, p1 = game_state.players
+    return SearchState(game_state.h_walls, game_state.v_walls,
+                       cell_index(*p0.pos), cell_index(*p1.pos),
+                       p0.walls_left, p1.walls_left)
+
+
+def _flat_score(h_walls, v_walls, my_cell, opp_cell, my_goal, opp_goal):
+    """evaluate_position on plain ints."""
+    my_path = _path_length(h_walls, v_walls, my_cell, my_goal)
+    opp_path = _path_length(h_walls, v_walls, opp_cell, opp_goal)
+    return opp_path - my_path
 
 
 # ─────────────────────────────────────────────
@@ -113,8 +216,6 @@ class QuoridorAI(QuoridorAI):
         - 80% of the time, moves pawn toward goal
         - 20% of the time, places random wall (if available)
         """
-        from board import get_valid_moves
-        
         player = game_state.players[self.player_index]
         
         # 80% chance to move pawn, 20% to place wall
@@ -169,46 +270,44 @@ class QuoridorAI(QuoridorAI):
         - Moves toward goal along shortest path
         - Uses walls strategically when it gives significant advantage
         """
-        from board import get_valid_moves
-        
-        player = game_state.players[self.player_index]
-        
-        # Get current path lengths
-        my_current_path = get_shortest_path_length(game_state, self.player_index)
-        opp_current_path = get_shortest_path_length(game_state, 1 - self.player_index)
+        me = self.player_index
+        state = _pack_state(game_state)
+        my_goal = game_state.players[me].goal_row
+        opp_goal = game_state.players[1 - me].goal_row
+        my_cell, opp_cell = (state.pos0, state.pos1) if me == 0 else (state.pos1, state.pos0)
+        h_walls, v_walls = state.h_walls, state.v_walls
         
         # Evaluate best pawn move
         best_pawn_move = None
         best_pawn_score = float('-inf')
         
-        valid_moves = get_valid_moves(game_state, self.player_index)
-        for move in valid_moves:
+        for cell in pawn_move_cells(h_walls, v_walls, my_cell, opp_cell):
             # Simulate move
-            temp_state = deepcopy(game_state)
-            temp_state.players[self.player_index].pos = move
+            score = _flat_score(h_walls, v_walls, cell, opp_cell, my_goal, opp_goal)
             
-            score = evaluate_position(temp_state, self.player_index)
             if score > best_pawn_score:
                 best_pawn_score = score
-                best_pawn_move = move
+                best_pawn_move = CELL_POS[cell]
         
         # Evaluate best wall placement (only if we have walls)
         best_wall = None
         best_wall_score = float('-inf')
         
-        if player.walls_left > 0:
-            valid_walls = get_all_valid_wall_placements(game_state, self.player_index)
-            
-            # Sample walls to check (checking all is expensive)
-            sample_size = min(20, len(valid_walls))
-            walls_to_check = random.sample(valid_walls, sample_size) if len(valid_walls) > sample_size else valid_walls
+        if game_state.players[me].walls_left > 0:
+            # Shortlist walls to check (checking all is expensive)
+            walls_to_check = _shortlist_walls(
+                h_walls, v_walls, opp_cell, opp_goal, _pack_pawns(game_state), 20,
+            )
             
             for wall in walls_to_check:
                 # Simulate wall placement
-                temp_state = deepcopy(game_state)
-                temp_state.walls.append((wall[2], wall[0], wall[1]))
+                x, y, orientation = wall
+                bit = wall_bit(x, y)
+                if orientation == "H":
+                    score = _flat_score(h_walls | bit, v_walls, my_cell, opp_cell, my_goal, opp_goal)
+                else:
+                    score = _flat_score(h_walls, v_walls | bit, my_cell, opp_cell, my_goal, opp_goal)
                 
-                score = evaluate_position(temp_state, self.player_index)
                 if score > best_wall_score:
                     best_wall_score = score
                     best_wall = wall
@@ -234,120 +333,381 @@ class QuoridorAI(QuoridorAI):
         - Considers both pawn moves and wall placements
         - Uses advanced evaluation function
         """
-        depth = 3  # Look ahead 3 moves
+        state = _pack_state(game_state)
+        goals = tuple(p.goal_row for p in game_state.players)
         
-        _, best_move = self._minimax(game_state, depth, float('-inf'), float('inf'), True)
+        if HARD_WORKERS > 1:
+            move_code = self._parallel_search(state, goals)
+        else:
+            deadline = time.monotonic() + HARD_TIME_BUDGET
+            _, _, move_code = _iterative_deepening(
+                *state, self.player_index, goals, self.tt, deadline)
         
-        if best_move:
-            return best_move
+        if move_code is not None:
+            return _decode_move(move_code)
         
         # Fallback to medium strategy if minimax fails
         return self._medium_strategy(game_state)
     
-    
-    def _minimax(self, game_state, depth, alpha, beta, maximizing_player):
+    def _parallel_search(self, state, goals):
         """
-        Minimax algorithm with alpha-beta pruning.
-        Returns: (score, move)
+        Lazy SMP: HARD_WORKERS processes search the same root with
+        different random seeds, so each samples different filler walls,
+        while sharing one transposition table. Whatever one worker has
+        searched, the others reuse; the deepest finished searches then
+        vote on the move.
         """
-        from board import get_valid_moves, place_wall, make_move
+        if self._pool is None:
+            self._start_pool()
         
-        # Base case: depth 0 or game over
-        if depth == 0:
-            return evaluate_position(game_state, self.player_index), None
+        base_seed = random.getrandbits(32)
+        futures = [
+            self._pool.submit(_root_search_worker, state, self.player_index,
+                              goals, base_seed + i, HARD_TIME_BUDGET)
+            for i in range(HARD_WORKERS)
+        ]
+        return _vote([future.result() for future in futures])
+    
+    def _start_pool(self):
+        """
+        Starts the HARD_WORKERS search processes right away, from the
+        calling thread: forking later from the GUI's AI thread would copy
+        a process with other threads running.
+        """
+        self._shared_slots = RawArray('Q', 2 << SHARED_TT_BITS)
+        self._pool = ProcessPoolExecutor(max_workers=HARD_WORKERS,
+                                         initializer=_init_search_worker,
+                                         initargs=(self._shared_slots,))
+        for future in [self._pool.submit(int) for _ in range(HARD_WORKERS)]:
+            future.result()
+
+
+# ─────────────────────────────────────────────
+#  MINIMAX SEARCH KERNEL
+# ─────────────────────────────────────────────
+# The search runs on a flat state of plain ints: the two wall bitboards,
+# both pawn cells and both wall counts. Moves are encoded as one int:
+# 0..80 is a pawn destination cell, WALL_MOVE_BASE + slot * 2 + (0 for
+# "H", 1 for "V") is a wall.
+
+WALL_MOVE_BASE = 81
+
+HARD_TIME_BUDGET = 1.0  # Seconds of search per hard AI move
+HARD_MAX_DEPTH = 8
+HARD_WORKERS = min(4, os.cpu_count() or 1)  # 1 = search in this process
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the move's deadline has passed."""
+
+
+def _encode_wall(x, y, orientation):
+    return WALL_MOVE_BASE + (x * (BOARD_SIZE - 1) + y) * 2 + (orientation == "V")
+
+
+def _decode_move(move_code):
+    """Turns a move code back into ("pawn", (x, y)) or ("wall", (x, y, o))."""
+    if move_code < WALL_MOVE_BASE:
+        return ("pawn", CELL_POS[move_code])
+    slot, vertical = divmod(move_code - WALL_MOVE_BASE, 2)
+    x, y = divmod(slot, BOARD_SIZE - 1)
+    return ("wall", (x, y, "V" if vertical else "H"))
+
+
+# ─────────────────────────────────────────────
+#  TRANSPOSITION TABLE
+# ─────────────────────────────────────────────
+# Positions are hashed with Zobrist keys: one random 64-bit number per
+# feature, XORed together. Moves update the key incrementally.
+
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+
+_zobrist_rng = random.Random(0x5EED)  # Own RNG so the tables never vary
+ZOBRIST_PAWN = [[_zobrist_rng.getrandbits(64) for _ in range(81)] for _ in range(2)]
+ZOBRIST_WALL = [_zobrist_rng.getrandbits(64) for _ in range(64 * 2)]
+ZOBRIST_WALLS_LEFT = [[_zobrist_rng.getrandbits(64) for _ in range(21)] for _ in range(2)]
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)  # Player 1 to move
+
+
+def _zobrist_key(h_walls, v_walls, pos0, pos1, walls0, walls1, mover):
+    """Full Zobrist key of a flat state; search updates it incrementally."""
+    key = ZOBRIST_PAWN[0][pos0] ^ ZOBRIST_PAWN[1][pos1]
+    key ^= ZOBRIST_WALLS_LEFT[0][walls0] ^ ZOBRIST_WALLS_LEFT[1][walls1]
+    for slot in range(64):
+        if h_walls >> slot & 1:
+            key ^= ZOBRIST_WALL[slot * 2]
+        if v_walls >> slot & 1:
+            key ^= ZOBRIST_WALL[slot * 2 + 1]
+    if mover == 1:
+        key ^= ZOBRIST_SIDE
+    return key
+
+
+SHARED_TT_BITS = 18  # 2**18 slots of two 64-bit words, 4 MiB
+_SCORE_OFFSET = 1 << 20
+_SCORE_SHIFT = 16
+
+
+class SharedTranspositionTable:
+    """
+    TranspositionTable over a flat buffer of 64-bit words that several
+    processes probe and fill at once, without locks. Slot key % size
+    holds (key ^ data, data): a slot torn by two concurrent writers
+    fails the key check and reads as a miss. New entries always replace.
+    """
+    
+    def __init__(self, slots):
+        self.slots = slots
+        self.index_mask = (len(slots) >> 1) - 1
+    
+    def probe(self, key):
+        index = (key & self.index_mask) << 1
+        data = self.slots[index + 1]
+        if self.slots[index] ^ data != key:
+            return None
+        move = (data & 0x3FF) - 1
+        return (data >> 12 & 0xF, (data >> _SCORE_SHIFT) - _SCORE_OFFSET,
+                data >> 10 & 0x3, None if move < 0 else move)
+    
+    def store(self, key, depth, score, flag, best_move):
+        if not -_SCORE_OFFSET < score < _SCORE_OFFSET:
+            return  # No moves searched, nothing worth sharing
+        data = ((score + _SCORE_OFFSET) << _SCORE_SHIFT | depth << 12 | flag << 10
+                | (0 if best_move is None else best_move + 1))
+        index = (key & self.index_mask) << 1
+        self.slots[index + 1] = data
+        self.slots[index] = key ^ data
+
+
+class TranspositionTable:
+    """Fixed-size LRU map of Zobrist key -> (depth, score, flag, best_move)."""
+    
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+    
+    def probe(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+    
+    def store(self, key, depth, score, flag, best_move):
+        self.entries[key] = (depth, score, flag, best_move)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)  # Evict least recently used
+
+
+def _iterative_deepening(h_walls, v_walls, pos0, pos1, walls0, walls1,
+                         root_player, goals, tt, deadline):
+    """
+    Searches depth 1, 2, ... until `deadline` or HARD_MAX_DEPTH. Each
+    finished depth leaves its best moves in the transposition table,
+    which orders the next, deeper search.
+    Returns (depth, score, move_code) of the last completed depth.
+    """
+    key = _zobrist_key(h_walls, v_walls, pos0, pos1, walls0, walls1, root_player)
+    
+    completed, score, move_code = 0, 0, None
+    for depth in range(1, HARD_MAX_DEPTH + 1):
+        try:
+            depth_score, best = _minimax_flat(
+                h_walls, v_walls, pos0, pos1, walls0, walls1,
+                depth, float('-inf'), float('inf'), True,
+                root_player, goals, tt, key, deadline,
+            )
+        except _SearchTimeout:
+            break  # Keep the move from the last completed depth
         
-        # Check if game is over
-        for i, player in enumerate(game_state.players):
-            if player.pos[1] == player.goal_row:
-                if i == self.player_index:
-                    return 1000, None  # We won
-                else:
-                    return -1000, None  # Opponent won
+        if best is not None:
+            completed, score, move_code = depth, depth_score, best
+        if abs(depth_score) >= 1000:
+            break  # Win or loss already forced, deeper search can't help
+    
+    return completed, score, move_code
+
+
+# The table a worker process shares with its siblings, set up when the
+# process starts and kept across moves (one pool per QuoridorAI)
+_WORKER_TT = None
+
+
+def _init_search_worker(shared_slots):
+    global _WORKER_TT
+    _WORKER_TT = SharedTranspositionTable(memoryview(shared_slots).cast('B').cast('Q'))
+
+
+def _root_search_worker(state, root_player, goals, seed, budget):
+    """Runs in a worker process: one seeded iterative-deepening search."""
+    random.seed(seed)
+    return _iterative_deepening(*state, root_player, goals, _WORKER_TT,
+                                time.monotonic() + budget)
+
+
+def _vote(results):
+    """
+    Picks a move from the workers' (depth, score, move_code) results.
+    Only the deepest searches count; each votes for its move with weight
+    score - worst_score + 1.
+    """
+    results = [(depth, score, move) for depth, score, move in results if move is not None]
+    if not results:
+        return None
+    
+    deepest = max(depth for depth, _, _ in results)
+    results = [(score, move) for depth, score, move in results if depth == deepest]
+    worst = min(score for score, _ in results)
+    votes = {}
+    for score, move in results:
+        votes[move] = votes.get(move, 0) + score - worst + 1
+    return max(votes, key=votes.get)
+
+
+WALL_CANDIDATES = 10  # Walls searched per node
+
+
+def _ordered_moves(h_walls, v_walls, pos0, pos1, walls_left, mover, goals, tt_move):
+    """
+    Move codes for `mover` in the order alpha-beta should try them:
+    the transposition-table move, pawn moves closest to the goal row,
+    then the WALL_CANDIDATES walls that lengthen the opponent's path most.
+    """
+    cur, opp = (pos0, pos1) if mover == 0 else (pos1, pos0)
+    goal_row = goals[mover]
+    moves = sorted(pawn_move_cells(h_walls, v_walls, cur, opp),
+                   key=lambda cell: abs(cell % BOARD_SIZE - goal_row))
+    
+    valid_walls = ()
+    if walls_left > 0:
+        pawns = ((pos0, goals[0]), (pos1, goals[1]))
+        valid_walls = _valid_walls_for(h_walls, v_walls, pawns)
         
-        current_player_idx = self.player_index if maximizing_player else (1 - self.player_index)
+        walls_to_check = _shortlist_walls(h_walls, v_walls, opp, goals[1 - mover],
+                                          pawns, WALL_CANDIDATES)
+        moves.extend(_encode_wall(x, y, o) for x, y, o in walls_to_check)
+    
+    # Previous best move first; it is still legal if it was generated above
+    # or, for a wall that was not shortlisted, if it is in the full valid list
+    if tt_move is not None:
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        elif tt_move >= WALL_MOVE_BASE and _decode_move(tt_move)[1] in valid_walls:
+            moves.insert(0, tt_move)
+    
+    return moves
+
+
+def _minimax_flat(h_walls, v_walls, pos0, pos1, walls0, walls1,
+                  depth, alpha, beta, maximizing, root_player, goals, tt, key, deadline):
+    """
+    Minimax algorithm with alpha-beta pruning over the flat state.
+    `key` is the Zobrist key of the state, used to probe and fill `tt`.
+    Raises _SearchTimeout once time.monotonic() passes `deadline`.
+    Returns: (score, move_code)
+    """
+    # Base case: depth 0
+    if depth == 0:
+        my_pos, opp_pos = (pos0, pos1) if root_player == 0 else (pos1, pos0)
+        return _flat_score(h_walls, v_walls, my_pos, opp_pos,
+                           goals[root_player], goals[1 - root_player]), None
+    
+    # Check if game is over
+    if pos0 % BOARD_SIZE == goals[0]:
+        return (1000 if root_player == 0 else -1000), None
+    if pos1 % BOARD_SIZE == goals[1]:
+        return (1000 if root_player == 1 else -1000), None
+    
+    if time.monotonic() > deadline:
+        raise _SearchTimeout
+    
+    # Reuse a previous search of this position when it is deep enough
+    tt_move = None
+    entry = tt.probe(key)
+    if entry is not None:
+        tt_depth, tt_score, tt_flag, tt_move = entry
+        if tt_depth >= depth:
+            if tt_flag == TT_EXACT:
+                return tt_score, tt_move
+            if tt_flag == TT_LOWER:
+                alpha = max(alpha, tt_score)
+            else:
+                beta = min(beta, tt_score)
+            if beta <= alpha:
+                return tt_score, tt_move
+    
+    alpha_orig, beta_orig = alpha, beta
+    mover = root_player if maximizing else 1 - root_player
+    walls_left = walls0 if mover == 0 else walls1
+    
+    cur = pos0 if mover == 0 else pos1
+    moves = _ordered_moves(h_walls, v_walls, pos0, pos1, walls_left,
+                           mover, goals, tt_move)
+    
+    best_score = float('-inf') if maximizing else float('inf')
+    best_move = None
+    
+    for move in moves:
+        if move < WALL_MOVE_BASE:
+            if mover == 0:
+                child = (h_walls, v_walls, move, pos1, walls0, walls1)
+            else:
+                child = (h_walls, v_walls, pos0, move, walls0, walls1)
+            child_key = key ^ ZOBRIST_PAWN[mover][cur] ^ ZOBRIST_PAWN[mover][move]
+        else:
+            wall_index = move - WALL_MOVE_BASE
+            bit = wall_bit(*divmod(wall_index // 2, BOARD_SIZE - 1))
+            new_h = h_walls if wall_index & 1 else h_walls | bit
+            new_v = v_walls | bit if wall_index & 1 else v_walls
+            child = (new_h, new_v, pos0, pos1,
+                     walls0 - (mover == 0), walls1 - (mover == 1))
+            child_key = (key ^ ZOBRIST_WALL[wall_index]
+                         ^ ZOBRIST_WALLS_LEFT[mover][walls_left]
+                         ^ ZOBRIST_WALLS_LEFT[mover][walls_left - 1])
         
-        if maximizing_player:
-            max_eval = float('-inf')
-            best_move = None
-            
-            # Try all pawn moves
-            valid_moves = get_valid_moves(game_state, current_player_idx)
-            for move in valid_moves:
-                temp_state = deepcopy(game_state)
-                temp_state.players[current_player_idx].pos = move
-                
-                eval_score, _ = self._minimax(temp_state, depth - 1, alpha, beta, False)
-                
-                if eval_score > max_eval:
-                    max_eval = eval_score
-                    best_move = ("pawn", move)
-                
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break  # Beta cutoff
-            
-            # Try wall placements (sample to keep it fast)
-            if game_state.players[current_player_idx].walls_left > 0:
-                valid_walls = get_all_valid_wall_placements(game_state, current_player_idx)
-                sample_size = min(10, len(valid_walls))
-                walls_to_check = random.sample(valid_walls, sample_size) if len(valid_walls) > sample_size else valid_walls
-                
-                for wall in walls_to_check:
-                    temp_state = deepcopy(game_state)
-                    temp_state.walls.append((wall[2], wall[0], wall[1]))
-                    temp_state.players[current_player_idx].walls_left -= 1
-                    
-                    eval_score, _ = self._minimax(temp_state, depth - 1, alpha, beta, False)
-                    
-                    if eval_score > max_eval:
-                        max_eval = eval_score
-                        best_move = ("wall", wall)
-                    
-                    alpha = max(alpha, eval_score)
-                    if beta <= alpha:
-                        break
-            
-            return max_eval, best_move
+        score, _ = _minimax_flat(*child, depth - 1, alpha, beta, not maximizing,
+                                 root_player, goals, tt, child_key ^ ZOBRIST_SIDE, deadline)
         
-        else:  # Minimizing player
-            min_eval = float('inf')
-            best_move = None
-            
-            # Try all pawn moves
-            valid_moves = get_valid_moves(game_state, current_player_idx)
-            for move in valid_moves:
-                temp_state = deepcopy(game_state)
-                temp_state.players[current_player_idx].pos = move
-                
-                eval_score, _ = self._minimax(temp_state, depth - 1, alpha, beta, True)
-                
-                if eval_score < min_eval:
-                    min_eval = eval_score
-                    best_move = ("pawn", move)
-                
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break  # Alpha cutoff
-            
-            # Try wall placements (sample)
-            if game_state.players[current_player_idx].walls_left > 0:
-                valid_walls = get_all_valid_wall_placements(game_state, current_player_idx)
-                sample_size = min(10, len(valid_walls))
-                walls_to_check = random.sample(valid_walls, sample_size) if len(valid_walls) > sample_size else valid_walls
-                
-                for wall in walls_to_check:
-                    temp_state = deepcopy(game_state)
-                    temp_state.walls.append((wall[2], wall[0], wall[1]))
-                    temp_state.players[current_player_idx].walls_left -= 1
-                    
-                    eval_score, _ = self._minimax(temp_state, depth - 1, alpha, beta, True)
-                    
-                    if eval_score < min_eval:
-                        min_eval = eval_score
-                        best_move = ("wall", wall)
-                    
-                    beta = min(beta, eval_score)
-                    if beta <= alpha:
-                        break
-            
-            return min_eval, best_move
\ No newline at end of file
+        if maximizing:
+            if score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+        else:
+            if score < best_score:
+                best_score, best_move = score, move
+            beta = min(beta, score)
+        if beta <= alpha:
+            break  # Cutoff
+    
+    if best_score <= alpha_orig:
+        flag = TT_UPPER
+    elif best_score >= beta_orig:
+        flag = TT_LOWER
+    else:
+        flag = TT_EXACT
+    tt.store(key, depth, best_score, flag, best_move)
+    
+    return best_score, best_move
+
+
+# ─────────────────────────────────────────────
+#  WARM-UP
+# ─────────────────────────────────────────────
+
+def prewarm(max_moves=60):
+    """
+    Plays a throwaway medium-vs-medium game. Under PyPy this gets the
+    move generation, path and wall kernels traced and compiled before
+    the first real AI turn. The GUI calls it when PYPY_HOT=1 is set.
+    """
+    game = Game()
+    players = (QuoridorAI(0, "medium"), QuoridorAI(1, "medium"))
+    for _ in range(max_moves):
+        if game.is_game_over():
+            break
+        move_type, move_data = players[game.get_current_player()].get_move(game.state)
+        if move_type == "pawn":
+            game.move_pawn(move_data)
+        else:
+            game.place_wall(*move_data)
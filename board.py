@@ -1,7 +1,8 @@
-from copy import deepcopy
 from collections import deque
+from functools import lru_cache
 
 BOARD_SIZE = 9
+HISTORY_LIMIT = 500  # Undoable actions kept per game
 
 
 # ─────────────────────────────────────────────
@@ -9,6 +10,8 @@ BOARD_SIZE = 9
 # ─────────────────────────────────────────────
 
 class Player:
+    __slots__ = ("pos", "goal_row", "walls_left")
+
     def __init__(self, start_pos, goal_row):
         self.pos = start_pos
         self.goal_row = goal_row
@@ -18,14 +21,21 @@ class Player:
 class GameState:
     """Stores everything needed for a full game snapshot."""
 
+    __slots__ = ("players", "walls", "wall_order", "h_walls", "v_walls", "current_player",
+                 "valid_moves_cache")
+
     def __init__(self):
         self.players = [
             Player(start_pos=(4, 0), goal_row=8),  # Player 0 (top)
             Player(start_pos=(4, 8), goal_row=0),  # Player 1 (bottom)
         ]
-        self.walls = []          # Walls stored as tuples: (x, y, orientation)
+        self.walls = set()       # Placed walls: (orientation, x, y)
                                  # orientation = "H" or "V"
+        self.wall_order = []     # The same walls in placement order
+        self.h_walls = 0         # Bitboards of placed walls, one bit per
+        self.v_walls = 0         # wall slot (see wall_bit)
         self.current_player = 0  # 0 or 1
+        self.valid_moves_cache = (None, ())  # (position key, moves), see current_valid_moves
 
 
 # ─────────────────────────────────────────────
@@ -33,107 +43,291 @@ class GameState:
 # ─────────────────────────────────────────────
 
 class History:
-    def __init__(self):
-        self.undo_stack = []
-        self.redo_stack = []
+    """
+    Undo/redo log of deltas rather than state snapshots. Each entry is
+    ("pawn", player_index, old_pos, new_pos) or
+    ("wall", player_index, x, y, orientation), applied in place.
+    Only the last `max_entries` actions can be undone, and as many redone.
+    """
+
+    def __init__(self, max_entries=HISTORY_LIMIT):
+        self.undo_stack = deque(maxlen=max_entries)
+        self.redo_stack = deque(maxlen=max_entries)  # (generation, delta)
+        self.generation = 0
 
-    def push(self, game_state):
-        self.undo_stack.append(deepcopy(game_state))
-        self.redo_stack.clear()  # New action = redo history cleared
+    def record(self, delta):
+        self.undo_stack.append(delta)
+        # New action = redo history cleared: entries from older
+        # generations are dropped by the next undo or redo instead of here
+        self.generation += 1
+
+    def _drop_stale_redo(self):
+        """
+        Forgets the redo entries recorded before the latest action. They
+        were pushed before any current one, so if the top entry is stale,
+        all of them are.
+        """
+        if self.redo_stack and self.redo_stack[-1][0] != self.generation:
+            self.redo_stack.clear()
 
     def undo(self, game_state):
         if not self.undo_stack:
-            return None
-        self.redo_stack.append(deepcopy(game_state))
-        return self.undo_stack.pop()
+            return False
+        self._drop_stale_redo()
+        delta = self.undo_stack.pop()
+        self.redo_stack.append((self.generation, delta))
+        self.invert(delta, game_state)
+        return True
 
     def redo(self, game_state):
+        self._drop_stale_redo()
         if not self.redo_stack:
-            return None
-        self.undo_stack.append(deepcopy(game_state))
-        return self.redo_stack.pop()
+            return False
+        _, delta = self.redo_stack.pop()
+        self.undo_stack.append(delta)
+        self.apply(delta, game_state)
+        return True
+
+    @staticmethod
+    def apply(delta, game_state):
+        """Plays a recorded action on the state."""
+        if delta[0] == "pawn":
+            _, player_index, _, new_pos = delta
+            game_state.players[player_index].pos = new_pos
+        else:
+            _, player_index, x, y, orientation = delta
+            add_wall(game_state, orientation, x, y)
+            game_state.players[player_index].walls_left -= 1
+        game_state.current_player = 1 - player_index
+
+    @staticmethod
+    def invert(delta, game_state):
+        """Takes back a recorded action."""
+        if delta[0] == "pawn":
+            _, player_index, old_pos, _ = delta
+            game_state.players[player_index].pos = old_pos
+        else:
+            _, player_index, x, y, orientation = delta
+            remove_wall(game_state, orientation, x, y)
+            game_state.players[player_index].walls_left += 1
+        game_state.current_player = player_index
 
 
 # ─────────────────────────────────────────────
 #  MOVEMENT LOGIC
 # ─────────────────────────────────────────────
 
-def is_on_board(x, y):
-    return 0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE
+# Move kernels pack both bitboards into one int, h_walls | v_walls << WALL_SLOTS,
+# so any edge is checked with a single AND against its EDGE_WALL_MASK
+WALL_SLOTS = (BOARD_SIZE - 1) * (BOARD_SIZE - 1)
+
+
+def wall_bit(x, y):
+    """Returns the bitboard mask of the wall slot at (x, y)."""
+    return 1 << (x * (BOARD_SIZE - 1) + y)
+
+
+# ─────────────────────────────────────────────
+#  PRECOMPUTED BOARD TABLES
+# ─────────────────────────────────────────────
+# Cells are indexed 0..80 as x * BOARD_SIZE + y. Directions follow the
+# order (1,0), (-1,0), (0,1), (0,-1) used throughout the move logic.
+
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+SIDE_DIRECTIONS = ((2, 3), (3, 2), (0, 1), (1, 0))  # perpendiculars per direction
+
+
+def cell_index(x, y):
+    return x * BOARD_SIZE + y
+
+
+def _edge_wall_mask(x, y, nx, ny):
+    """Combined-walls mask of the wall slots that block the edge (x,y)-(nx,ny)."""
+    if x != nx:
+        left = min(x, nx)
+        mask = 0
+        if y < BOARD_SIZE - 1:
+            mask |= wall_bit(left, y)
+        if y > 0:
+            mask |= wall_bit(left, y - 1)
+        return mask << WALL_SLOTS
+    top = min(y, ny)
+    mask = 0
+    if x < BOARD_SIZE - 1:
+        mask |= wall_bit(x, top)
+    if x > 0:
+        mask |= wall_bit(x - 1, top)
+    return mask
+
+
+CELL_POS = [(i // BOARD_SIZE, i % BOARD_SIZE) for i in range(BOARD_SIZE * BOARD_SIZE)]
+STEPS = []            # STEPS[cell][dir] -> neighbouring cell, or -1 if off board
+EDGE_WALL_MASK = []   # EDGE_WALL_MASK[cell][dir] -> combined-walls mask blocking that step
+
+for _cell, (_x, _y) in enumerate(CELL_POS):
+    _steps, _masks = [], []
+    for _dx, _dy in DIRECTIONS:
+        _nx, _ny = _x + _dx, _y + _dy
+        if not (0 <= _nx < BOARD_SIZE and 0 <= _ny < BOARD_SIZE):
+            _steps.append(-1)
+            _masks.append(0)
+            continue
+        _steps.append(cell_index(_nx, _ny))
+        _masks.append(_edge_wall_mask(_x, _y, _nx, _ny))
+    STEPS.append(tuple(_steps))
+    EDGE_WALL_MASK.append(tuple(_masks))
+
 
+# ─────────────────────────────────────────────
+#  BITSET FLOOD FILL
+# ─────────────────────────────────────────────
+# A set of cells is an int with bit `cell` set. One flood step moves a
+# whole frontier at once: a shift by BOARD_SIZE for x ± 1 and by 1 for
+# y ± 1, masked to the cells whose step in that direction is open.
 
-def wall_blocks_move(walls, from_pos, to_pos):
-    """Checks if a wall physically blocks a movement."""
+_SLOT_COLUMN = (1 << (BOARD_SIZE - 1)) - 1  # One x column of wall slots
+CAN_STEP_X = sum(1 << cell_index(x, y) for x in range(BOARD_SIZE - 1) for y in range(BOARD_SIZE))
+CAN_STEP_Y = sum(1 << cell_index(x, y) for x in range(BOARD_SIZE) for y in range(BOARD_SIZE - 1))
+ROW_MASK = [sum(1 << cell_index(x, row) for x in range(BOARD_SIZE)) for row in range(BOARD_SIZE)]
 
-    x1, y1 = from_pos
-    x2, y2 = to_pos
 
-    # Horizontal movement (moving left or right, same row)
-    if x1 != x2:
-        # Check for vertical walls between the two columns
-        left = min(x1, x2)
-        y = y1
-        # A vertical wall at (left, y) blocks movement from (left, y) to (left+1, y)
-        # But it also blocks movement from (left, y-1) to (left+1, y-1) if y > 0
-        # So we need to check both (left, y) and (left, y-1)
-        return ("V", left, y) in walls or (y > 0 and ("V", left, y - 1) in walls)
+def _slots_to_cells(bits):
+    """Moves each wall slot bit (x, y) of a bitboard to cell bit (x, y)."""
+    cells = 0
+    for x in range(BOARD_SIZE - 1):
+        cells |= (bits >> x * (BOARD_SIZE - 1) & _SLOT_COLUMN) << x * BOARD_SIZE
+    return cells
 
-    # Vertical movement (moving up or down, same column)
-    if y1 != y2:
-        # Check for horizontal walls between the two rows
-        x = x1
-        top = min(y1, y2)
-        # A horizontal wall at (x, top) blocks movement from (x, top) to (x, top+1)
-        # But it also blocks movement from (x-1, top) to (x-1, top+1) if x > 0
-        # So we need to check both (x, top) and (x-1, top)
-        return ("H", x, top) in walls or (x > 0 and ("H", x - 1, top) in walls)
 
-    return False
+@lru_cache(maxsize=4096)
+def open_steps(h_walls, v_walls):
+    """
+    (down, up, right, left): the cells that can step y + 1, y - 1,
+    x + 1 and x - 1 without leaving the board or crossing a wall.
+    """
+    # An H wall at (x, y) cuts the y + 1 step of cells (x, y) and (x+1, y),
+    # a V wall at (x, y) the x + 1 step of cells (x, y) and (x, y+1)
+    h_cells = _slots_to_cells(h_walls)
+    v_cells = _slots_to_cells(v_walls)
+    down = CAN_STEP_Y & ~(h_cells | h_cells << BOARD_SIZE)
+    right = CAN_STEP_X & ~(v_cells | v_cells << 1)
+    # A step back is open exactly where the step forward from the
+    # neighbour is
+    return down, down << 1, right, right << BOARD_SIZE
+
+
+# Per wall slot: the cells whose y + 1 step an H wall there cuts, and the
+# cells whose x + 1 step a V wall there cuts
+H_WALL_CUTS = [0] * WALL_SLOTS
+V_WALL_CUTS = [0] * WALL_SLOTS
+for _x in range(BOARD_SIZE - 1):
+    for _y in range(BOARD_SIZE - 1):
+        _slot = _x * (BOARD_SIZE - 1) + _y
+        H_WALL_CUTS[_slot] = 1 << cell_index(_x, _y) | 1 << cell_index(_x + 1, _y)
+        V_WALL_CUTS[_slot] = 1 << cell_index(_x, _y) | 1 << cell_index(_x, _y + 1)
+
+
+# Walls run between the (BOARD_SIZE+1)^2 grid corners; corner (i, j) is
+# bit i * (BOARD_SIZE+1) + j. Each wall covers three corners in a line.
+# A new wall can only cut a path if it closes a loop, which needs at
+# least two of its corners to touch the board edge or another wall.
+
+def _corner_bit(i, j):
+    return 1 << (i * (BOARD_SIZE + 1) + j)
+
+
+BORDER_CORNERS = sum(
+    _corner_bit(i, j)
+    for i in range(BOARD_SIZE + 1) for j in range(BOARD_SIZE + 1)
+    if i in (0, BOARD_SIZE) or j in (0, BOARD_SIZE)
+)
+H_WALL_CORNERS = [0] * WALL_SLOTS
+V_WALL_CORNERS = [0] * WALL_SLOTS
+for _x in range(BOARD_SIZE - 1):
+    for _y in range(BOARD_SIZE - 1):
+        _slot = _x * (BOARD_SIZE - 1) + _y
+        H_WALL_CORNERS[_slot] = sum(_corner_bit(_x + k, _y + 1) for k in range(3))
+        V_WALL_CORNERS[_slot] = sum(_corner_bit(_x + 1, _y + k) for k in range(3))
+
+
+@lru_cache(maxsize=4096)
+def anchored_corners(h_walls, v_walls):
+    """Corners on the board edge or covered by a placed wall."""
+    corners = BORDER_CORNERS
+    for walls, wall_corners in ((h_walls, H_WALL_CORNERS), (v_walls, V_WALL_CORNERS)):
+        while walls:
+            low = walls & -walls  # Lowest placed wall
+            corners |= wall_corners[low.bit_length() - 1]
+            walls ^= low
+    return corners
 
 
 def get_valid_moves(game_state, player_index):
     p = game_state.players[player_index]
     opponent = game_state.players[1 - player_index]
+    cells = pawn_move_cells(
+        game_state.h_walls, game_state.v_walls,
+        cell_index(*p.pos), cell_index(*opponent.pos),
+    )
+    return [CELL_POS[cell] for cell in cells]
+
+
+def current_valid_moves(game_state):
+    """
+    get_valid_moves for the player to move, as a tuple. Kept on the state
+    and reused until the mover, a pawn or the walls change; keyed on those
+    rather than invalidated by move_pawn / place_wall, so positions set up
+    by hand are never served stale moves.
+    """
+    p0, p1 = game_state.players
+    key = (game_state.current_player, p0.pos, p1.pos, game_state.h_walls, game_state.v_walls)
+    cached_key, moves = game_state.valid_moves_cache
+    if cached_key != key:
+        moves = tuple(get_valid_moves(game_state, game_state.current_player))
+        game_state.valid_moves_cache = (key, moves)
+    return moves
 
-    moves = []
-    x, y = p.pos
-    ox, oy = opponent.pos
 
-    # 4 basic directions
-    directions = [(1,0), (-1,0), (0,1), (0,-1)]
+@lru_cache(maxsize=1 << 16)
+def pawn_move_cells(h_walls, v_walls, cur, opp):
+    """
+    Legal destination cells (a tuple) for the pawn on `cur` with the
+    opponent on `opp`. Cached, as search revisits the same positions.
+    """
+    moves = []
+    walls = h_walls | v_walls << WALL_SLOTS
+    steps, masks = STEPS[cur], EDGE_WALL_MASK[cur]
 
-    for dx, dy in directions:
-        nx, ny = x + dx, y + dy      ##new position after moving in that direction
-        if not is_on_board(nx, ny):  ##check if new position is on board
+    for d in range(4):
+        nb = steps[d]
+        if nb < 0:  ##off board
             continue
-        if wall_blocks_move(game_state.walls, (x, y), (nx, ny)): ##check if there is a wall that blocks the move
+        if walls & masks[d]:  ##a wall blocks the move
             continue
 
         # If not stepping on opponent → valid
-        if (nx, ny) != (ox, oy):
-            moves.append((nx, ny))
+        if nb != opp:
+            moves.append(nb)
             continue
 
         # If stepping on opponent → try jump
-        jx, jy = ox + dx, oy + dy
-        if (
-            is_on_board(jx, jy)
-            and not wall_blocks_move(game_state.walls, (ox, oy), (jx, jy))
-        ):
-            moves.append((jx, jy))
-        else:
-            # Side diagonal steps if direct jump is blocked
-            side1 = (ox + dy, oy + dx)
-            side2 = (ox - dy, oy - dx)
-            for sx, sy in (side1, side2):
-                if (
-                    is_on_board(sx, sy)
-                    and not wall_blocks_move(game_state.walls, (ox, oy), (sx, sy))
-                    and not wall_blocks_move(game_state.walls, (x, y), (sx, sy))  # Also check from current position
-                ):
-                    moves.append((sx, sy))
+        jump = STEPS[opp][d]
+        if jump >= 0 and not walls & EDGE_WALL_MASK[opp][d]:
+            moves.append(jump)
+            continue
 
-    return moves
+        # Side diagonal steps if direct jump is blocked
+        for side in SIDE_DIRECTIONS[d]:
+            diag = STEPS[opp][side]
+            if diag < 0 or walls & EDGE_WALL_MASK[opp][side]:
+                continue
+            # Also check the sideways step along the current row, which
+            # only applies when the opponent is above/below us
+            if d >= 2 and walls & masks[side]:
+                continue
+            moves.append(diag)
+
+    return tuple(moves)
 
 
 # ─────────────────────────────────────────────
@@ -147,70 +341,195 @@ def is_valid_wall_placement(game_state, x, y, orientation):
     if x < 0 or y < 0 or x >= BOARD_SIZE-1 or y >= BOARD_SIZE-1:
         return False
 
-    wall = (orientation, x, y)
+    pawns = tuple(
+        (cell_index(*p.pos), p.goal_row) for p in game_state.players
+    )
+    return wall_is_legal(
+        game_state.h_walls, game_state.v_walls, x, y, orientation, pawns
+    )
 
-    # Cannot overlap existing walls
-    if wall in game_state.walls:
-        return False
 
-    # Cannot cross walls - check BOTH directions for adjacent walls
+def wall_is_legal(h_walls, v_walls, x, y, orientation, pawns, path_masks=None):
+    """
+    Overlap/crossing rules plus the path check for an on-board wall slot.
+    `pawns` holds (cell, goal_row) for each player. `path_masks`, if given,
+    holds path_wall_mask for each pawn: a wall off that path leaves it
+    intact, so that pawn needs no search.
+    """
+    bit = wall_bit(x, y)
+
     if orientation == "H":
+        # Cannot overlap existing walls
+        if h_walls & bit:
+            return False
         # Check horizontal wall to the right
-        if ("H", x+1, y) in game_state.walls:
+        if x + 1 < BOARD_SIZE - 1 and h_walls & wall_bit(x + 1, y):
             return False
         # Check horizontal wall to the left
-        if ("H", x-1, y) in game_state.walls:
+        if x > 0 and h_walls & wall_bit(x - 1, y):
             return False
     else:  # vertical
+        # Cannot overlap existing walls
+        if v_walls & bit:
+            return False
         # Check vertical wall below
-        if ("V", x, y+1) in game_state.walls:
+        if y + 1 < BOARD_SIZE - 1 and v_walls & wall_bit(x, y + 1):
             return False
         # Check vertical wall above
-        if ("V", x, y-1) in game_state.walls:
+        if y > 0 and v_walls & wall_bit(x, y - 1):
+            return False
+
+    # A wall touching the edge/other walls at one corner or none closes no
+    # loop, so it cannot cut anyone off from a goal they can reach now
+    slot = x * (BOARD_SIZE - 1) + y
+    corners = H_WALL_CORNERS[slot] if orientation == "H" else V_WALL_CORNERS[slot]
+    touching = corners & anchored_corners(h_walls, v_walls)
+    if not touching & (touching - 1):
+        return goals_reachable(h_walls, v_walls, pawns)
+
+    # Every player must still reach its goal with the new wall in place.
+    # Only the two steps the wall cuts (and their reverses) change, so
+    # close those in the current open-step masks instead of rebuilding
+    down, up, right, left = open_steps(h_walls, v_walls)
+    if orientation == "H":
+        cut = H_WALL_CUTS[slot]
+        steps = (down & ~cut, up & ~(cut << 1), right, left)
+    else:
+        cut = V_WALL_CUTS[slot]
+        steps = (down, up, right & ~cut, left & ~(cut << BOARD_SIZE))
+        bit <<= WALL_SLOTS  # Combined-walls bit, as in path_wall_mask
+    for i, (cell, goal_row) in enumerate(pawns):
+        if path_masks is not None and not path_masks[i] & bit:
+            continue
+        if not _flood_reachable(steps, cell, goal_row):
             return False
+    return True
 
-    # Temporarily place the wall to check paths
-    game_state.walls.append(wall)
 
-    ok = True
-    for p in game_state.players:
-        if not has_path_to_goal(game_state, p):
-            ok = False
-            break
+def legal_walls(h_walls, v_walls, pawns):
+    """
+    Every legal wall as (x, y, orientation), slot by slot, "H" before "V".
+    All candidates share one shortest path per pawn, so only walls that
+    cross it need a reachability search.
+    """
+    path_masks = []
+    for cell, goal_row in pawns:
+        mask = path_wall_mask(h_walls, v_walls, cell, goal_row)
+        if mask is None:
+            return []  # Already cut off; no wall can reopen a path
+        path_masks.append(mask)
+
+    walls = []
+    for x in range(BOARD_SIZE - 1):
+        for y in range(BOARD_SIZE - 1):
+            for orientation in ("H", "V"):
+                if wall_is_legal(h_walls, v_walls, x, y, orientation, pawns, path_masks):
+                    walls.append((x, y, orientation))
+    return walls
+
+
+@lru_cache(maxsize=4096)
+def goals_reachable(h_walls, v_walls, pawns):
+    """True if every (cell, goal_row) in `pawns` can reach its goal row."""
+    steps = open_steps(h_walls, v_walls)
+    return all(_flood_reachable(steps, cell, goal_row) for cell, goal_row in pawns)
+
+
+def _flood_step(frontier, steps):
+    """Every cell one open step away from some cell of `frontier`."""
+    down, up, right, left = steps
+    return (
+        (frontier & down) << 1 | (frontier & up) >> 1
+        | (frontier & right) << BOARD_SIZE | (frontier & left) >> BOARD_SIZE
+    )
+
+
+def _flood_distance(steps, start, goal_row):
+    """
+    Bitset flood fill from cell `start` over the open-step masks `steps`
+    (see open_steps), one BFS layer per step. Returns the number of
+    layers until it touches `goal_row`, or -1 if it stops growing first.
+    """
+    goal_mask = ROW_MASK[goal_row]
+    reached = frontier = 1 << start
+    dist = 0
+    # Opponent pawn is ignored: only walls can cut a path
 
-    # Remove temporary wall
-    game_state.walls.remove(wall)
+    while frontier:
+        if frontier & goal_mask:
+            return dist
+        frontier = _flood_step(frontier, steps) & ~reached
+        reached |= frontier
+        dist += 1
 
-    return ok
+    return -1
 
 
-def has_path_to_goal(game_state, player):
-    """BFS to ensure player has at least one path."""
-    start = player.pos
-    visited = set([start])
-    q = deque([start])
+def _flood_reachable(steps, start, goal_row):
+    """True if the flood fill from `start` over `steps` reaches `goal_row`."""
+    return _flood_distance(steps, start, goal_row) >= 0
 
-    while q:
-        x, y = q.popleft()
 
-        if y == player.goal_row:
-            return True  # valid path found
+def flood_distance(h_walls, v_walls, start, goal_row):
+    """
+    Length of the shortest wall-respecting path from cell `start` to
+    `goal_row`, or -1 if the row is unreachable. A bitset BFS: every
+    layer of the search is one flood step of the whole frontier.
+    """
+    return _flood_distance(open_steps(h_walls, v_walls), start, goal_row)
 
-        # Check all 4 directions without considering opponent blocking
-        directions = [(1,0), (-1,0), (0,1), (0,-1)]
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if (nx, ny) in visited:
-                continue
-            if not is_on_board(nx, ny):
-                continue
-            if wall_blocks_move(game_state.walls, (x, y), (nx, ny)):
-                continue
-            
-            visited.add((nx, ny))
-            q.append((nx, ny))
 
-    return False
+def bfs_path(h_walls, v_walls, start, goal_row):
+    """
+    One shortest path from cell `start` to `goal_row` as a list of cells
+    (start first), or None if the row is unreachable. The search floods
+    bitset layers (see flood_distance), then walks back one layer at a
+    time, so no per-cell queue or parent table is needed.
+    """
+    steps = open_steps(h_walls, v_walls)
+    down, up, right, _ = steps
+    goal_mask = ROW_MASK[goal_row]
+    reached = frontier = 1 << start
+    layers = []
+
+    while not frontier & goal_mask:
+        layers.append(frontier)
+        frontier = _flood_step(frontier, steps) & ~reached
+        if not frontier:
+            return None
+        reached |= frontier
+
+    cell = (frontier & goal_mask & -(frontier & goal_mask)).bit_length() - 1
+    path = [cell]
+    for layer in reversed(layers):
+        # A neighbour in the previous layer with an open step onto `cell`
+        bit = 1 << cell
+        if layer & down & bit >> 1:
+            cell -= 1
+        elif layer & up & bit << 1:
+            cell += 1
+        elif layer & right & bit >> BOARD_SIZE:
+            cell -= BOARD_SIZE
+        else:
+            cell += BOARD_SIZE
+        path.append(cell)
+    path.reverse()
+    return path
+
+
+def path_wall_mask(h_walls, v_walls, start, goal_row):
+    """
+    Combined-walls mask (h_walls | v_walls << WALL_SLOTS layout) of every
+    wall slot that would cut one shortest path from `start` to
+    `goal_row`, or None if the row is unreachable.
+    """
+    path = bfs_path(h_walls, v_walls, start, goal_row)
+    if path is None:
+        return None
+    mask = 0
+    for a, b in zip(path, path[1:]):
+        mask |= EDGE_WALL_MASK[a][STEPS[a].index(b)]
+    return mask
 
 
 # ─────────────────────────────────────────────
@@ -218,13 +537,39 @@ def has_path_to_goal(game_state, player):
 # ─────────────────────────────────────────────
 
 def make_move(game_state, new_pos):
-    """Moves the pawn if legal."""
-    moves = get_valid_moves(game_state, game_state.current_player)
-    if new_pos in moves:
-        game_state.players[game_state.current_player].pos = new_pos
-        game_state.current_player = 1 - game_state.current_player
-        return True
-    return False
+    """
+    Moves the pawn if legal. Returns (moved, winner): winner is the
+    mover's index if the move reached its goal row, else None.
+    """
+    player_index = game_state.current_player
+    if new_pos in current_valid_moves(game_state):
+        player = game_state.players[player_index]
+        player.pos = new_pos
+        game_state.current_player = 1 - player_index
+        return True, (player_index if new_pos[1] == player.goal_row else None)
+    return False, None
+
+
+def add_wall(game_state, orientation, x, y):
+    """Adds a wall to the state without any legality checks."""
+    wall = (orientation, x, y)
+    game_state.walls.add(wall)
+    game_state.wall_order.append(wall)
+    if orientation == "H":
+        game_state.h_walls |= wall_bit(x, y)
+    else:
+        game_state.v_walls |= wall_bit(x, y)
+
+
+def remove_wall(game_state, orientation, x, y):
+    """Removes the wall at (x, y) from the state."""
+    wall = (orientation, x, y)
+    game_state.walls.discard(wall)
+    game_state.wall_order.remove(wall)
+    if orientation == "H":
+        game_state.h_walls ^= wall_bit(x, y)
+    else:
+        game_state.v_walls ^= wall_bit(x, y)
 
 
 def place_wall(game_state, x, y, orientation):
@@ -237,7 +582,7 @@ def place_wall(game_state, x, y, orientation):
     if not is_valid_wall_placement(game_state, x, y, orientation):
         return False
 
-    game_state.walls.append((orientation, x, y))
+    add_wall(game_state, orientation, x, y)
     p.walls_left -= 1
     game_state.current_player = 1 - game_state.current_player
     return True
@@ -275,18 +620,17 @@ class Game:
         if self.winner is not None:
             return False  # Game already over
             
-        # Save state before move for undo
-        self.history.push(self.state)
+        player_index = self.state.current_player
+        old_pos = self.state.players[player_index].pos
         
         # Attempt the move
-        success = make_move(self.state, new_pos)
+        success, winner = make_move(self.state, new_pos)
         
         if success:
-            # Check for win condition
-            self._check_winner()
-        else:
-            # Move failed, remove from history
-            self.history.undo_stack.pop()
+            # Record the move for undo
+            self.history.record(("pawn", player_index, old_pos, new_pos))
+            # Only the player who just moved can have won
+            self.winner = winner
             
         return success
     
@@ -298,27 +642,31 @@ class Game:
         if self.winner is not None:
             return False  # Game already over
             
-        # Save state before action for undo
-        self.history.push(self.state)
+        player_index = self.state.current_player
         
         # Attempt wall placement
         success = place_wall(self.state, x, y, orientation)
         
-        if not success:
-            # Placement failed, remove from history
-            self.history.undo_stack.pop()
+        if success:
+            # Record the action for undo
+            self.history.record(("wall", player_index, x, y, orientation))
             
         return success
     
+    def force_wall(self, orientation, x, y):
+        """
+        Puts a wall on the board without legality checks, turn change or
+        history, to set up positions. Goes through add_wall like
+        place_wall does, so the wall bitboards stay in sync.
+        """
+        add_wall(self.state, orientation, x, y)
+    
     def undo(self):
         """
         Undo the last move.
         Returns True if undo was successful, False if no moves to undo.
         """
-        previous_state = self.history.undo(self.state)
-        
-        if previous_state is not None:
-            self.state = previous_state
+        if self.history.undo(self.state):
             self.winner = None  # Reset winner on undo
             return True
         
@@ -329,10 +677,7 @@ class Game:
         Redo a previously undone move.
         Returns True if redo was successful, False if no moves to redo.
         """
-        next_state = self.history.redo(self.state)
-        
-        if next_state is not None:
-            self.state = next_state
+        if self.history.redo(self.state):
             # Re-check winner after redo
             self._check_winner()
             return True
@@ -357,7 +702,7 @@ class Game:
     
     def get_valid_moves_for_current_player(self):
         """Returns list of valid moves for the current player."""
-        return get_valid_moves(self.state, self.state.current_player)
+        return list(current_valid_moves(self.state))
     
     def is_game_over(self):
         """Returns True if the game has ended."""
@@ -1,9 +1,12 @@
+import copy
+import multiprocessing
+import os
 import pygame
 import sys
+import threading
+from functools import lru_cache
 from board import Game, BOARD_SIZE
-from ai import QuoridorAI
-# Initialize Pygame
-pygame.init()
+from ai import QuoridorAI, prewarm
 
 # Screen settings
 SCREEN_WIDTH = 800
@@ -33,6 +36,30 @@ COLOR_GOAL_P2 = (200, 200, 255)
 
 # Game settings
 FPS = 60
+IDLE_WAIT_MS = 200  # Event wait while no hover feedback is on screen
+# Everything else (key presses, window and text-input events, ...) is
+# dropped by SDL before it reaches the Python-side queue
+HANDLED_EVENTS = [pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION,
+                  pygame.WINDOWEXPOSED, pygame.USEREVENT + 1, pygame.USEREVENT + 2]
+
+
+@lru_cache(maxsize=256)
+def render_text(font, text, color):
+    """Antialiased text surface, cached: the UI redraws the same strings every frame."""
+    return font.render(text, True, color)
+
+
+def coalesce_motion(events):
+    """
+    Drops each MOUSEMOTION that is directly followed by another one, so
+    a burst of motion is handled once at its final position. Motion
+    before a click is kept, as buttons need the hover state it sets.
+    """
+    return [
+        event for event, following in zip(events, events[1:] + [None])
+        if not (event.type == pygame.MOUSEMOTION and following is not None
+                and following.type == pygame.MOUSEMOTION)
+    ]
 
 
 class Button:
@@ -43,15 +70,26 @@ class Button:
         self.color = color
         self.hover_color = hover_color
         self.is_hovered = False
+        self.font = None
+        self.surfaces = None  # (normal, hovered), rendered on first draw
+    
+    def prepare(self, font):
+        self.font = font
+        self.surfaces = []
+        for color in (self.color, self.hover_color):
+            surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+            area = surf.get_rect()
+            pygame.draw.rect(surf, color, area, border_radius=5)
+            pygame.draw.rect(surf, COLOR_TEXT, area, 2, border_radius=5)
+            
+            text_surface = render_text(font, self.text, COLOR_TEXT)
+            surf.blit(text_surface, text_surface.get_rect(center=area.center))
+            self.surfaces.append(surf.convert_alpha())
         
     def draw(self, screen, font):
-        color = self.hover_color if self.is_hovered else self.color
-        pygame.draw.rect(screen, color, self.rect, border_radius=5)
-        pygame.draw.rect(screen, COLOR_TEXT, self.rect, 2, border_radius=5)
-        
-        text_surface = font.render(self.text, True, COLOR_TEXT)
-        text_rect = text_surface.get_rect(center=self.rect.center)
-        screen.blit(text_surface, text_rect)
+        if font is not self.font:
+            self.prepare(font)
+        screen.blit(self.surfaces[self.is_hovered], self.rect)
         
     def handle_event(self, event):
         if event.type == pygame.MOUSEMOTION:
@@ -65,9 +103,14 @@ class Button:
 class QuoridorGUI:
     
     def __init__(self):
+        # Initialize Pygame here rather than on import: the AI's worker
+        # processes import this module too when they are spawned
+        pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Quoridor Game")
         self.clock = pygame.time.Clock()
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(HANDLED_EVENTS)
         
         # Fonts
         self.font_large = pygame.font.Font(None, 48)
@@ -79,6 +122,7 @@ class QuoridorGUI:
         self.ai = None  # Will be set if playing against AI
         self.game_mode = None  # "pvp" or "ai"
         self.ai_difficulty = None  # "easy", "medium", or "hard"
+        self.ai_busy = False  # A worker thread is computing the AI's move
         
         # UI state
         self.wall_preview = None  # (x, y, orientation) or None
@@ -90,6 +134,7 @@ class QuoridorGUI:
         self.undo_button = Button(220, 750, 100, 50, "Undo", COLOR_BUTTON, COLOR_BUTTON_HOVER)
         self.redo_button = Button(340, 750, 100, 50, "Redo", COLOR_BUTTON, COLOR_BUTTON_HOVER)
         self.mode_button = Button(460, 750, 100, 50, "Mode", COLOR_BUTTON, COLOR_BUTTON_HOVER)
+        self.game_buttons = [self.reset_button, self.undo_button, self.redo_button, self.mode_button]
         
         # Mode selection screen
         self.selecting_mode = True
@@ -100,167 +145,199 @@ class QuoridorGUI:
             "ai_hard": Button(250, 540, 300, 60, "vs AI (Hard)", COLOR_BUTTON, COLOR_BUTTON_HOVER),
         }
         
+        # Mouse area that can hit a cell or wall slot (edges inclusive)
+        board_px = BOARD_SIZE * (CELL_SIZE + GAP_SIZE)
+        self.board_rect = pygame.Rect(BOARD_OFFSET_X, BOARD_OFFSET_Y, board_px + 1, board_px + 1)
+        
+        # Screen coordinates of each board column / row
+        self.sx = [BOARD_OFFSET_X + x * (CELL_SIZE + GAP_SIZE) for x in range(BOARD_SIZE)]
+        self.sy = [BOARD_OFFSET_Y + y * (CELL_SIZE + GAP_SIZE) for y in range(BOARD_SIZE)]
+        
+        # Board column / row under each window pixel (may be off the board)
+        self.px_to_bx = [(px - BOARD_OFFSET_X) // (CELL_SIZE + GAP_SIZE) for px in range(SCREEN_WIDTH)]
+        self.py_to_by = [(py - BOARD_OFFSET_Y) // (CELL_SIZE + GAP_SIZE) for py in range(SCREEN_HEIGHT)]
+        
+        # Static board and wall pieces, drawn once and blitted every frame
+        self.board_bg = self.build_board_surface()
+        self.mode_screen_bg = self.build_mode_screen()
+        self.wall_surfs = self.build_wall_surfaces(COLOR_WALL)
+        self.wall_preview_surfs = self.build_wall_surfaces(COLOR_WALL_PREVIEW)
+        self.highlight_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
+        self.highlight_surface.fill(COLOR_VALID_MOVE)
+        self.pawn_surfs = [self.build_pawn_surface(COLOR_PLAYER1, "1"),
+                           self.build_pawn_surface(COLOR_PLAYER2, "2")]
+        
+        # Turn indicator (surface, position) for each player
+        arrow_left = render_text(self.font_medium, "<<", COLOR_PLAYER1)
+        arrow_right = render_text(self.font_medium, ">>", COLOR_PLAYER2)
+        self.turn_arrows = [(arrow_left, (180, 655)),
+                            (arrow_right, arrow_right.get_rect(topright=(SCREEN_WIDTH - 180, 655)))]
+        
+        # (wall bitboards, blit list) of the walls last drawn
+        self.wall_blits_cache = (None, [])
+        
+        # Screen areas to push to the display this frame; a full flip
+        # is used whenever the game state or scene may have changed
+        self.dirty_rects = []
+        self.full_redraw = True
+        
     def board_to_screen(self, x, y):
-        screen_x = BOARD_OFFSET_X + x * (CELL_SIZE + GAP_SIZE)
-        screen_y = BOARD_OFFSET_Y + y * (CELL_SIZE + GAP_SIZE)
-        return screen_x, screen_y
+        return self.sx[x], self.sy[y]
     
     def screen_to_board(self, screen_x, screen_y):
+        if 0 <= screen_x < SCREEN_WIDTH and 0 <= screen_y < SCREEN_HEIGHT:
+            return self.px_to_bx[screen_x], self.py_to_by[screen_y]
+        # Drags can report positions outside the window
         x = (screen_x - BOARD_OFFSET_X) // (CELL_SIZE + GAP_SIZE)
         y = (screen_y - BOARD_OFFSET_Y) // (CELL_SIZE + GAP_SIZE)
         return x, y
     
     def get_wall_at_mouse(self, mouse_pos):
-        mx, my = mouse_pos
+        step = CELL_SIZE + GAP_SIZE
+        rel_x = mouse_pos[0] - BOARD_OFFSET_X
+        rel_y = mouse_pos[1] - BOARD_OFFSET_Y
         best_wall = None
-        best_dist = float('inf')
-        detection_tolerance = 15
-        
-        # Horizontal walls
-        for x in range(BOARD_SIZE - 1):
-            for y in range(BOARD_SIZE - 1):
-                sx, sy = self.board_to_screen(x, y)
-                wall_y = sy + CELL_SIZE
-                wall_x_start = sx
-                wall_x_end = sx + CELL_SIZE * 2
-                
-                if wall_x_start <= mx <= wall_x_end and abs(my - wall_y) < detection_tolerance:
-                    dist = abs(my - wall_y)
-                    if dist < best_dist:
-                        best_dist = dist
-                        best_wall = (x, y, "H")
-        
-        # Vertical walls
-        for x in range(BOARD_SIZE - 1):
-            for y in range(BOARD_SIZE - 1):
-                sx, sy = self.board_to_screen(x, y)
-                wall_x = sx + CELL_SIZE
-                wall_y_start = sy
-                wall_y_end = sy + CELL_SIZE * 2
-                
-                if wall_y_start <= my <= wall_y_end and abs(mx - wall_x) < detection_tolerance:
-                    dist = abs(mx - wall_x)
-                    if dist < best_dist:
-                        best_dist = dist
-                        best_wall = (x, y, "V")
+        best_dist = detection_tolerance = 15
+        
+        # Each wall slot sits on the gap line CELL_SIZE past its cell and
+        # spans two cells; on a tie the leftmost / topmost slot wins
+        
+        # Horizontal walls: nearest gap line between rows
+        y = (rel_y - CELL_SIZE + step // 2) // step
+        dist = abs(rel_y - CELL_SIZE - y * step)
+        if 0 <= y < BOARD_SIZE - 1 and dist < detection_tolerance:
+            x = max(0, -((CELL_SIZE * 2 - rel_x) // step))
+            if x <= min(BOARD_SIZE - 2, rel_x // step):
+                best_wall, best_dist = (x, y, "H"), dist
+        
+        # Vertical walls: nearest gap line between columns
+        x = (rel_x - CELL_SIZE + step // 2) // step
+        dist = abs(rel_x - CELL_SIZE - x * step)
+        if 0 <= x < BOARD_SIZE - 1 and dist < best_dist:
+            y = max(0, -((CELL_SIZE * 2 - rel_y) // step))
+            if y <= min(BOARD_SIZE - 2, rel_y // step):
+                best_wall = (x, y, "V")
         
         return best_wall
     
-    def draw_board(self):
+    def build_board_surface(self):
+        board_px = BOARD_SIZE * (CELL_SIZE + GAP_SIZE)
+        surface = pygame.Surface((board_px, board_px)).convert()
+        surface.fill(COLOR_BACKGROUND)
+        
         for x in range(BOARD_SIZE):
-            sx, sy = self.board_to_screen(x, 8)
-            pygame.draw.rect(self.screen, COLOR_GOAL_P1, (sx, sy, CELL_SIZE, CELL_SIZE))
+            sx, sy = self.sx[x], self.sy[8]
+            sx, sy = sx - BOARD_OFFSET_X, sy - BOARD_OFFSET_Y
+            pygame.draw.rect(surface, COLOR_GOAL_P1, (sx, sy, CELL_SIZE, CELL_SIZE))
             
-            sx, sy = self.board_to_screen(x, 0)
-            pygame.draw.rect(self.screen, COLOR_GOAL_P2, (sx, sy, CELL_SIZE, CELL_SIZE))
+            sx, sy = self.sx[x], self.sy[0]
+            sx, sy = sx - BOARD_OFFSET_X, sy - BOARD_OFFSET_Y
+            pygame.draw.rect(surface, COLOR_GOAL_P2, (sx, sy, CELL_SIZE, CELL_SIZE))
         
         for x in range(BOARD_SIZE):
             for y in range(BOARD_SIZE):
-                sx, sy = self.board_to_screen(x, y)
-                pygame.draw.rect(self.screen, COLOR_CELL, (sx, sy, CELL_SIZE, CELL_SIZE))
-                pygame.draw.rect(self.screen, COLOR_BOARD, (sx, sy, CELL_SIZE, CELL_SIZE), 2)
+                sx, sy = self.sx[x], self.sy[y]
+                sx, sy = sx - BOARD_OFFSET_X, sy - BOARD_OFFSET_Y
+                pygame.draw.rect(surface, COLOR_CELL, (sx, sy, CELL_SIZE, CELL_SIZE))
+                pygame.draw.rect(surface, COLOR_BOARD, (sx, sy, CELL_SIZE, CELL_SIZE), 2)
+        
+        return surface
+    
+    def draw_board(self):
+        self.screen.blit(self.board_bg, (BOARD_OFFSET_X, BOARD_OFFSET_Y))
+    
+    def build_wall_surfaces(self, color):
+        surfs = {}
+        for orientation, size in (("H", (WALL_VISUAL_LENGTH, WALL_THICKNESS)),
+                                  ("V", (WALL_THICKNESS, WALL_VISUAL_LENGTH))):
+            surf = pygame.Surface(size).convert()
+            surf.fill(color)
+            surfs[orientation] = surf
+        return surfs
+    
+    def build_pawn_surface(self, color, label):
+        surf = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
+        center = (CELL_SIZE // 2, CELL_SIZE // 2)
+        pygame.draw.circle(surf, color, center, CELL_SIZE // 3)
+        pygame.draw.circle(surf, COLOR_TEXT, center, CELL_SIZE // 3, 2)
+        text = render_text(self.font_medium, label, (255, 255, 255))
+        surf.blit(text, text.get_rect(center=center))
+        return surf
+    
+    def wall_screen_pos(self, x, y, orientation):
+        sx, sy = self.sx[x], self.sy[y]
+        if orientation == "H":
+            return sx + WALL_OFFSET, sy + CELL_SIZE - WALL_THICKNESS // 2
+        return sx + CELL_SIZE - WALL_THICKNESS // 2, sy + WALL_OFFSET
     
     def draw_walls(self):
-        for orientation, x, y in self.game.state.walls:
-            sx, sy = self.board_to_screen(x, y)
-            
-            if orientation == "H":
-                start_x = sx + WALL_OFFSET
-                start_y = sy + CELL_SIZE - WALL_THICKNESS // 2
-                pygame.draw.rect(self.screen, COLOR_WALL, (start_x, start_y, WALL_VISUAL_LENGTH, WALL_THICKNESS))
-            else:
-                start_x = sx + CELL_SIZE - WALL_THICKNESS // 2
-                start_y = sy + WALL_OFFSET
-                pygame.draw.rect(self.screen, COLOR_WALL, (start_x, start_y, WALL_THICKNESS, WALL_VISUAL_LENGTH))
+        state = self.game.state
+        key = (state.h_walls, state.v_walls)
+        if self.wall_blits_cache[0] != key:
+            surfs = self.wall_surfs
+            self.wall_blits_cache = (key, [
+                (surfs[orientation], self.wall_screen_pos(x, y, orientation))
+                for orientation, x, y in state.wall_order
+            ])
+        self.screen.blits(self.wall_blits_cache[1], doreturn=0)
+    
+    def wall_preview_rect(self, wall):
+        x, y, orientation = wall
+        return pygame.Rect(self.wall_screen_pos(x, y, orientation),
+                           self.wall_preview_surfs[orientation].get_size())
     
-    def draw_wall_preview(self):
-        if self.wall_preview is None:
+    def draw_wall_preview(self, walls_left):
+        if self.wall_preview is None or walls_left <= 0:
             return
         
         x, y, orientation = self.wall_preview
-        current_player = self.game.get_current_player()
-        if self.game.get_walls_left(current_player) <= 0:
-            return
-        
-        sx, sy = self.board_to_screen(x, y)
         
-        if orientation == "H":
-            start_x = sx + WALL_OFFSET
-            start_y = sy + CELL_SIZE - WALL_THICKNESS // 2
-            pygame.draw.rect(self.screen, COLOR_WALL_PREVIEW, (start_x, start_y, WALL_VISUAL_LENGTH, WALL_THICKNESS))
-        else:
-            start_x = sx + CELL_SIZE - WALL_THICKNESS // 2
-            start_y = sy + WALL_OFFSET
-            pygame.draw.rect(self.screen, COLOR_WALL_PREVIEW, (start_x, start_y, WALL_THICKNESS, WALL_VISUAL_LENGTH))
+        self.screen.blit(self.wall_preview_surfs[orientation],
+                         self.wall_screen_pos(x, y, orientation))
     
     def draw_pawns(self):
-        for i, player in enumerate(self.game.state.players):
-            x, y = player.pos
-            sx, sy = self.board_to_screen(x, y)
-            color = COLOR_PLAYER1 if i == 0 else COLOR_PLAYER2
-            center = (sx + CELL_SIZE // 2, sy + CELL_SIZE // 2)
-            
-            pygame.draw.circle(self.screen, color, center, CELL_SIZE // 3)
-            pygame.draw.circle(self.screen, COLOR_TEXT, center, CELL_SIZE // 3, 2)
-            
-            text = self.font_medium.render(str(i + 1), True, (255, 255, 255))
-            text_rect = text.get_rect(center=center)
-            self.screen.blit(text, text_rect)
+        self.screen.blits([(surf, self.board_to_screen(*player.pos))
+                           for surf, player in zip(self.pawn_surfs, self.game.state.players)],
+                          doreturn=0)
     
     def draw_valid_moves(self):
         if not self.show_valid_moves:
             return
         
-        valid_moves = self.game.get_valid_moves_for_current_player()
-        highlight_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-        highlight_surface.fill(COLOR_VALID_MOVE)
-        
-        for x, y in valid_moves:
-            sx, sy = self.board_to_screen(x, y)
-            self.screen.blit(highlight_surface, (sx, sy))
+        for x, y in self.game.get_valid_moves_for_current_player():
+            sx, sy = self.sx[x], self.sy[y]
+            self.screen.blit(self.highlight_surface, (sx, sy))
     
-    def draw_ui(self):
-        title = self.font_large.render("QUORIDOR", True, COLOR_TEXT)
+    def draw_ui(self, current, walls_left, game_over):
+        title = render_text(self.font_large, "QUORIDOR", COLOR_TEXT)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 40))
         self.screen.blit(title, title_rect)
         
-        p1_walls = self.game.get_walls_left(0)
-        p2_walls = self.game.get_walls_left(1)
+        p1_walls, p2_walls = walls_left
         
-        p1_text = self.font_medium.render(f"Player 1", True, COLOR_PLAYER1)
-        p1_walls_text = self.font_small.render(f"Walls: {p1_walls}", True, COLOR_TEXT)
+        p1_text = render_text(self.font_medium, f"Player 1", COLOR_PLAYER1)
+        p1_walls_text = render_text(self.font_small, f"Walls: {p1_walls}", COLOR_TEXT)
         self.screen.blit(p1_text, (50, 650))
         self.screen.blit(p1_walls_text, (50, 690))
         
-        p2_text = self.font_medium.render(f"Player 2", True, COLOR_PLAYER2)
-        p2_walls_text = self.font_small.render(f"Walls: {p2_walls}", True, COLOR_TEXT)
+        p2_text = render_text(self.font_medium, f"Player 2", COLOR_PLAYER2)
+        p2_walls_text = render_text(self.font_small, f"Walls: {p2_walls}", COLOR_TEXT)
         p2_text_rect = p2_text.get_rect(topright=(SCREEN_WIDTH - 50, 650))
         p2_walls_rect = p2_walls_text.get_rect(topright=(SCREEN_WIDTH - 50, 690))
         self.screen.blit(p2_text, p2_text_rect)
         self.screen.blit(p2_walls_text, p2_walls_rect)
         
-        if not self.game.is_game_over():
-            current = self.game.get_current_player()
-            turn_color = COLOR_PLAYER1 if current == 0 else COLOR_PLAYER2
-            turn_text = self.font_medium.render("<<", True, turn_color)
-            if current == 0:
-                arrow = "<<"
-                turn_text = self.font_medium.render(arrow, True, turn_color)
-                self.screen.blit(turn_text, (180, 655))
-            else:
-                arrow = ">>"
-                turn_text = self.font_medium.render(arrow, True, turn_color)
-                turn_rect = turn_text.get_rect(topright=(SCREEN_WIDTH - 180, 655))
-                self.screen.blit(turn_text, turn_rect)
+        if not game_over:
+            self.screen.blit(*self.turn_arrows[current])
         
         # Message
-        message_text = self.font_small.render(self.message, True, COLOR_TEXT)
+        message_text = render_text(self.font_small, self.message, COLOR_TEXT)
         message_rect = message_text.get_rect(center=(SCREEN_WIDTH // 2, 820))
         self.screen.blit(message_text, message_rect)
         
         # Instructions
         instr = "Left Click: Move | Right Click: Place Wall"
-        instr_text = self.font_small.render(instr, True, COLOR_TEXT)
+        instr_text = render_text(self.font_small, instr, COLOR_TEXT)
         instr_rect = instr_text.get_rect(center=(SCREEN_WIDTH // 2, 850))
         self.screen.blit(instr_text, instr_rect)
         
@@ -270,23 +347,53 @@ class QuoridorGUI:
         self.redo_button.draw(self.screen, self.font_small)
         self.mode_button.draw(self.screen, self.font_small)
     
-    def draw_mode_selection(self):
+    def draw_frame(self):
+        if self.selecting_mode:
+            self.draw_mode_selection()
+            return
+        
         self.screen.fill(COLOR_BACKGROUND)
         
-        title = self.font_large.render("QUORIDOR", True, COLOR_TEXT)
+        # Game accessors are read once; nothing changes mid-frame
+        current = self.game.get_current_player()
+        walls_left = (self.game.get_walls_left(0), self.game.get_walls_left(1))
+        game_over = self.game.is_game_over()
+        
+        self.draw_board()
+        self.draw_walls()
+        self.draw_wall_preview(walls_left[current])
+        self.draw_valid_moves()
+        self.draw_pawns()
+        self.draw_ui(current, walls_left, game_over)
+    
+    def build_mode_screen(self):
+        """The whole mode-selection screen with no button hovered."""
+        surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        surf.fill(COLOR_BACKGROUND)
+        
+        title = render_text(self.font_large, "QUORIDOR", COLOR_TEXT)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 150))
-        self.screen.blit(title, title_rect)
+        surf.blit(title, title_rect)
         
-        subtitle = self.font_medium.render("Select Game Mode", True, COLOR_TEXT)
+        subtitle = render_text(self.font_medium, "Select Game Mode", COLOR_TEXT)
         subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, 220))
-        self.screen.blit(subtitle, subtitle_rect)
+        surf.blit(subtitle, subtitle_rect)
         
         for button in self.mode_buttons.values():
-            button.draw(self.screen, self.font_medium)
+            button.draw(surf, self.font_medium)  # Nothing is hovered yet
+        return surf
+    
+    def draw_mode_selection(self):
+        self.screen.blit(self.mode_screen_bg, (0, 0))
+        for button in self.mode_buttons.values():
+            if button.is_hovered:
+                button.draw(self.screen, self.font_medium)
     
     def handle_mode_selection(self, event):
         for mode, button in self.mode_buttons.items():
             if button.handle_event(event):
+                if self.ai is not None:
+                    self.ai.close()  # A new AI is built for the new mode
                 if mode == "pvp":
                     self.game_mode = "pvp"
                     self.ai = None
@@ -307,6 +414,8 @@ class QuoridorGUI:
     def handle_click(self, pos, button):
         if self.game.is_game_over():
             return
+        if self.ai is not None and self.game.get_current_player() == self.ai.player_index:
+            return  # The AI's move is pending
         
         x, y = self.screen_to_board(pos[0], pos[1])
         
@@ -330,13 +439,47 @@ class QuoridorGUI:
                 else:
                     self.message = "Invalid wall placement!"
     
+    def ai_state_key(self):
+        state = self.game.state
+        return (state.current_player, state.players[0].pos, state.players[1].pos,
+                state.h_walls, state.v_walls)
+    
     def execute_ai_move(self):
-        if self.ai is None or self.game.is_game_over():
+        """
+        Starts computing the AI's move on a worker thread so the window
+        keeps responding; the result arrives as a USEREVENT + 2 event.
+        """
+        if self.ai is None or self.game.is_game_over() or self.ai_busy:
             return
         if self.game.get_current_player() != self.ai.player_index:
             return
         
-        move = self.ai.get_move(self.game.state)
+        self.ai_busy = True
+        worker = threading.Thread(
+            target=self.ai_worker,
+            args=(self.ai, copy.deepcopy(self.game.state), self.ai_state_key()),
+            daemon=True,
+        )
+        worker.start()
+    
+    @staticmethod
+    def ai_worker(ai, state, key):
+        move = None
+        try:
+            move = ai.get_move(state)
+        finally:
+            pygame.event.post(pygame.event.Event(pygame.USEREVENT + 2, ai=ai, key=key, move=move))
+    
+    def apply_ai_move(self, event):
+        self.ai_busy = False
+        if self.selecting_mode:
+            return
+        if event.ai is not self.ai or event.key != self.ai_state_key():
+            # Undo, New Game or Mode was used while the AI was thinking
+            self.execute_ai_move()
+            return
+        
+        move = event.move
         if move:
             move_type, move_data = move
             if move_type == "pawn":
@@ -379,16 +522,56 @@ class QuoridorGUI:
         
         return False
     
+    def view_snapshot(self):
+        buttons = self.mode_buttons.values() if self.selecting_mode else self.game_buttons
+        return (self.selecting_mode, self.show_valid_moves, self.wall_preview,
+                [button.is_hovered for button in buttons])
+    
+    def mark_view_changes(self, before):
+        """Queues the screen areas whose hover feedback changed since `before`."""
+        selecting_mode, show_valid_moves, wall_preview, hovered = before
+        if selecting_mode != self.selecting_mode:
+            self.full_redraw = True
+            return
+        
+        buttons = self.mode_buttons.values() if self.selecting_mode else self.game_buttons
+        for button, was_hovered in zip(buttons, hovered):
+            if button.is_hovered != was_hovered:
+                self.dirty_rects.append(button.rect)
+        
+        if show_valid_moves != self.show_valid_moves:
+            self.dirty_rects.append(self.board_rect)
+        elif wall_preview != self.wall_preview:
+            for wall in (wall_preview, self.wall_preview):
+                if wall is not None:
+                    self.dirty_rects.append(self.wall_preview_rect(wall))
+    
     def run(self):
         running = True
         
         while running:
-            self.clock.tick(FPS)
+            # Sleep until input or the AI timer arrives instead of spinning
+            active = self.show_valid_moves or self.wall_preview is not None
+            first = pygame.event.wait(1000 // FPS if active else IDLE_WAIT_MS)
+            events = pygame.event.get()
+            if first.type != pygame.NOEVENT:
+                events.insert(0, first)
+            if not events and not self.full_redraw:
+                continue
             
-            for event in pygame.event.get():
+            before = self.view_snapshot()
+            for event in coalesce_motion(events):
                 if event.type == pygame.QUIT:
                     running = False
                 
+                if event.type != pygame.MOUSEMOTION:
+                    # Clicks, AI moves and window exposure can change anything
+                    self.full_redraw = True
+                
+                if event.type == pygame.USEREVENT + 2:
+                    self.apply_ai_move(event)
+                    continue
+                
                 if self.selecting_mode:
                     self.handle_mode_selection(event)
                     continue
@@ -400,6 +583,11 @@ class QuoridorGUI:
                     self.handle_click(event.pos, event.button)
                 
                 if event.type == pygame.MOUSEMOTION:
+                    if not self.board_rect.collidepoint(event.pos):
+                        # Nothing on the board can be under the cursor
+                        self.show_valid_moves = False
+                        self.wall_preview = None
+                        continue
                     x, y = self.screen_to_board(event.pos[0], event.pos[1])
                     current_player = self.game.get_current_player()
                     pawn_pos = self.game.state.players[current_player].pos
@@ -410,25 +598,33 @@ class QuoridorGUI:
                 if event.type == pygame.USEREVENT + 1:
                     pygame.time.set_timer(pygame.USEREVENT + 1, 0)
                     self.execute_ai_move()
+            self.mark_view_changes(before)
             
-            self.screen.fill(COLOR_BACKGROUND)
+            # Motion that changed no hover feedback leaves the frame as is
+            if not self.full_redraw and not self.dirty_rects:
+                continue
             
-            if self.selecting_mode:
-                self.draw_mode_selection()
-            else:
-                self.draw_board()
-                self.draw_walls()
-                self.draw_wall_preview()
-                self.draw_valid_moves()
-                self.draw_pawns()
-                self.draw_ui()
+            self.draw_frame()
             
-            pygame.display.flip()
+            if self.full_redraw:
+                pygame.display.flip()
+            else:
+                pygame.display.update(self.dirty_rects)
+            self.full_redraw = False
+            self.dirty_rects = []
+            self.clock.tick(FPS)
         
+        if self.ai is not None:
+            self.ai.close()
         pygame.quit()
         sys.exit()
 
 
 if __name__ == "__main__":
+    # The hard AI searches in worker processes; in a frozen Windows build
+    # each of them would otherwise start the GUI again
+    multiprocessing.freeze_support()
+    if os.environ.get("PYPY_HOT") == "1":
+        prewarm()  # Let PyPy's JIT compile the AI before the window opens
     gui = QuoridorGUI()
     gui.run()
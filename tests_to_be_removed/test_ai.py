@@ -3,9 +3,24 @@ Comprehensive Testing Suite for Quoridor AI Implementation
 Run this to test all AI difficulties without GUI
 """
 
-from board import Game, BOARD_SIZE
+from board import Game, BOARD_SIZE, wall_bit
 from ai import QuoridorAI, get_shortest_path_length, evaluate_position
+import ai as ai_module
+import os
+import random
 import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+# Per-move output is off by default: printing inside the move loops slows
+# the runs down. Set TEST_VERBOSE=1 to see every move.
+VERBOSE = os.environ.get("TEST_VERBOSE")
+
+
+@lru_cache(maxsize=6)
+def _get_ai(player_index, difficulty):
+    """One AI per (player, difficulty), reused across tests; call reset() before use."""
+    return QuoridorAI(player_index=player_index, difficulty=difficulty)
 
 
 # ═══════════════════════════════════════════════════════
@@ -14,42 +29,36 @@ import time
 
 def print_board_state(game):
     """Print a visual representation of the board."""
-    print("\n" + "="*60)
-    print(f"  TURN: Player {game.get_current_player()}")
-    print(f"  WALLS: P0={game.get_walls_left(0)} | P1={game.get_walls_left(1)}")
-    print("="*60)
-    
-    # Print column numbers
-    print("     ", end="")
-    for x in range(BOARD_SIZE):
-        print(f" {x} ", end="")
-    print()
+    header = "     " + "".join(f" {x} " for x in range(BOARD_SIZE))
+    lines = [
+        "\n" + "="*60,
+        f"  TURN: Player {game.get_current_player()}",
+        f"  WALLS: P0={game.get_walls_left(0)} | P1={game.get_walls_left(1)}",
+        "="*60,
+        header,  # Column numbers
+    ]
     
-    # Print board
+    # Board rows; pawns overwrite their cells
+    p0_x, p0_y = game.state.players[0].pos  # Player 0 (Red/Top)
+    p1_x, p1_y = game.state.players[1].pos  # Player 1 (Blue/Bottom)
     for y in range(BOARD_SIZE):
-        print(f"  {y}  ", end="")
-        for x in range(BOARD_SIZE):
-            pos = (x, y)
-            if pos == game.state.players[0].pos:
-                print(" 0 ", end="")  # Player 0 (Red/Top)
-            elif pos == game.state.players[1].pos:
-                print(" 1 ", end="")  # Player 1 (Blue/Bottom)
-            else:
-                print(" . ", end="")
-        print(f"  {y}")
+        row = [" . "] * BOARD_SIZE
+        if p1_y == y:
+            row[p1_x] = " 1 "
+        if p0_y == y:
+            row[p0_x] = " 0 "
+        lines.append(f"  {y}  " + "".join(row) + f"  {y}")
     
-    # Print column numbers again
-    print("     ", end="")
-    for x in range(BOARD_SIZE):
-        print(f" {x} ", end="")
-    print("\n")
+    lines.append(header + "\n")  # Column numbers again
     
-    # Print walls
+    # Walls
     if game.state.walls:
-        print("  WALLS PLACED:")
-        for i, (orientation, x, y) in enumerate(game.state.walls, 1):
-            print(f"    {i}. {orientation} at ({x},{y})")
-    print()
+        lines.append("  WALLS PLACED:")
+        for i, (orientation, x, y) in enumerate(game.state.wall_order, 1):
+            lines.append(f"    {i}. {orientation} at ({x},{y})")
+    lines.append("")
+    
+    print("\n".join(lines))
 
 
 def print_separator():
@@ -70,7 +79,8 @@ def test_basic_ai_functionality():
     for difficulty in ["easy", "medium", "hard"]:
         print(f"\n🤖 Testing {difficulty.upper()} AI...")
         game = Game()
-        ai = QuoridorAI(player_index=1, difficulty=difficulty)
+        ai = _get_ai(1, difficulty)
+        ai.reset()
         
         success_count = 0
         for i in range(5):
@@ -78,11 +88,12 @@ def test_basic_ai_functionality():
             game.state.current_player = 1
             
             # Get AI move
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             move_type, move_data = ai.get_move(game.state)
-            elapsed = time.time() - start_time
+            elapsed = (time.perf_counter_ns() - start_time) / 1e9
             
-            print(f"  Move {i+1}: {move_type} {move_data} (took {elapsed:.3f}s)")
+            if VERBOSE:
+                print(f"  Move {i+1}: {move_type} {move_data} (took {elapsed:.3f}s)")
             
             # Validate and execute
             if move_type == "pawn":
@@ -90,14 +101,16 @@ def test_basic_ai_functionality():
                 if move_data in valid_moves:
                     game.move_pawn(move_data)
                     success_count += 1
-                    print(f"    ✓ Valid pawn move")
+                    if VERBOSE:
+                        print(f"    ✓ Valid pawn move")
                 else:
                     print(f"    ✗ INVALID pawn move! Valid: {valid_moves}")
             elif move_type == "wall":
                 x, y, orientation = move_data
                 if game.place_wall(x, y, orientation):
                     success_count += 1
-                    print(f"    ✓ Valid wall placement")
+                    if VERBOSE:
+                        print(f"    ✓ Valid wall placement")
                 else:
                     print(f"    ✗ INVALID wall placement!")
         
@@ -112,6 +125,65 @@ def test_basic_ai_functionality():
 # TEST 2: AI VS AI GAMES
 # ═══════════════════════════════════════════════════════
 
+def _search_in_process():
+    """Match worker setup: the matches already fill the CPUs, so no hard AI starts its own workers."""
+    ai_module.HARD_WORKERS = 1
+
+
+def _run_match(matchup):
+    """Play one AI vs AI game; returns its report lines."""
+    p0_diff, p1_diff = matchup
+    random.seed()  # Worker processes would otherwise share the parent's sequence
+    lines = [f"\n🎮 MATCH: {p0_diff.upper()} (P0) vs {p1_diff.upper()} (P1)", "-" * 60]
+    
+    game = Game()
+    # Fresh AIs: in a worker process a cached one would carry the
+    # parent's search pool, which only works in the parent
+    ai_p0 = QuoridorAI(player_index=0, difficulty=p0_diff)
+    ai_p1 = QuoridorAI(player_index=1, difficulty=p1_diff)
+    
+    move_count = 0
+    max_moves = 100
+    
+    while not game.is_game_over() and move_count < max_moves:
+        current = game.get_current_player()
+        ai = ai_p0 if current == 0 else ai_p1
+        
+        # Get and execute move
+        move_type, move_data = ai.get_move(game.state)
+        
+        if move_type == "pawn":
+            success = game.move_pawn(move_data)
+        else:
+            success = game.place_wall(*move_data)
+        
+        if not success:
+            lines.append(f"  ⚠️  Move {move_count+1} failed for P{current}!")
+        
+        move_count += 1
+        
+        # Show progress every 10 moves
+        if VERBOSE and move_count % 10 == 0:
+            p0_path = get_shortest_path_length(game.state, 0)
+            p1_path = get_shortest_path_length(game.state, 1)
+            lines.append(f"  Move {move_count}: Paths P0={p0_path}, P1={p1_path}")
+    
+    # Results
+    if game.is_game_over():
+        winner = game.get_winner()
+        winner_diff = p0_diff if winner == 0 else p1_diff
+        lines.append(f"\n  🏆 WINNER: Player {winner} ({winner_diff.upper()})")
+        lines.append(f"  📊 Total moves: {move_count}")
+    else:
+        lines.append(f"\n  ⏱️  Game reached move limit ({max_moves})")
+        p0_path = get_shortest_path_length(game.state, 0)
+        p1_path = get_shortest_path_length(game.state, 1)
+        lines.append(f"  📊 Final paths: P0={p0_path}, P1={p1_path}")
+    
+    lines.append(f"  📊 Final walls: P0={game.get_walls_left(0)}, P1={game.get_walls_left(1)}")
+    return lines
+
+
 def test_ai_vs_ai_games():
     """Run complete games between different AI difficulties."""
     print("╔" + "═"*58 + "╗")
@@ -125,53 +197,17 @@ def test_ai_vs_ai_games():
         ("medium", "hard"),
     ]
     
-    for p0_diff, p1_diff in matchups:
-        print(f"\n🎮 MATCH: {p0_diff.upper()} (P0) vs {p1_diff.upper()} (P1)")
-        print("-" * 60)
-        
-        game = Game()
-        ai_p0 = QuoridorAI(player_index=0, difficulty=p0_diff)
-        ai_p1 = QuoridorAI(player_index=1, difficulty=p1_diff)
-        
-        move_count = 0
-        max_moves = 100
-        
-        while not game.is_game_over() and move_count < max_moves:
-            current = game.get_current_player()
-            ai = ai_p0 if current == 0 else ai_p1
-            
-            # Get and execute move
-            move_type, move_data = ai.get_move(game.state)
-            
-            if move_type == "pawn":
-                success = game.move_pawn(move_data)
-            else:
-                success = game.place_wall(*move_data)
-            
-            if not success:
-                print(f"  ⚠️  Move {move_count+1} failed for P{current}!")
-            
-            move_count += 1
-            
-            # Show progress every 10 moves
-            if move_count % 10 == 0:
-                p0_path = get_shortest_path_length(game.state, 0)
-                p1_path = get_shortest_path_length(game.state, 1)
-                print(f"  Move {move_count}: Paths P0={p0_path}, P1={p1_path}")
-        
-        # Results
-        if game.is_game_over():
-            winner = game.get_winner()
-            winner_diff = p0_diff if winner == 0 else p1_diff
-            print(f"\n  🏆 WINNER: Player {winner} ({winner_diff.upper()})")
-            print(f"  📊 Total moves: {move_count}")
-        else:
-            print(f"\n  ⏱️  Game reached move limit ({max_moves})")
-            p0_path = get_shortest_path_length(game.state, 0)
-            p1_path = get_shortest_path_length(game.state, 1)
-            print(f"  📊 Final paths: P0={p0_path}, P1={p1_path}")
-        
-        print(f"  📊 Final walls: P0={game.get_walls_left(0)}, P1={game.get_walls_left(1)}")
+    # The games are independent, so play them side by side
+    workers = min(len(matchups), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_search_in_process) as pool:
+            reports = list(pool.map(_run_match, matchups))
+    else:
+        reports = map(_run_match, matchups)
+    
+    for lines in reports:
+        print("\n".join(lines))
     
     print_separator()
 
@@ -189,7 +225,8 @@ def test_ai_decision_quality():
     # Test 1: AI should move toward goal
     print("\n📊 Test 3.1: Forward Movement Preference")
     game = Game()
-    ai = QuoridorAI(player_index=1, difficulty="medium")
+    ai = _get_ai(1, "medium")
+    ai.reset()
     
     initial_pos = game.state.players[1].pos
     game.state.current_player = 1
@@ -219,7 +256,8 @@ def test_ai_decision_quality():
     # Test 2: Hard AI should use walls strategically
     print("\n📊 Test 3.2: Strategic Wall Usage (Hard AI)")
     game = Game()
-    ai = QuoridorAI(player_index=0, difficulty="hard")
+    ai = _get_ai(0, "hard")
+    ai.reset()
     
     # Position opponent close to goal
     game.state.players[1].pos = (4, 2)  # Close to top
@@ -240,6 +278,72 @@ def test_ai_decision_quality():
     print(f"  Walls used when opponent near goal: {walls_used}/5")
     print(f"  ✅ PASSED" if walls_used >= 1 else "  ⚠️  WARNING: Should use walls defensively")
     
+    # Test 3: Pruning must not change the result of the search
+    print("\n📊 Test 3.3: Alpha-Beta Matches Plain Minimax")
+    game = Game()
+    game.move_pawn((4, 1))
+    game.place_wall(3, 6, "H")
+    game.move_pawn((4, 2))
+    
+    # Both searches must see the same move list per position (the wall
+    # shortlist fills up with random walls), so generate each list once
+    generate_moves = ai_module._ordered_moves
+    move_lists = {}
+    
+    def fixed_moves(h_walls, v_walls, pos0, pos1, walls_left, mover, goals, tt_move):
+        key = (h_walls, v_walls, pos0, pos1, walls_left, mover)
+        if key not in move_lists:
+            move_lists[key] = generate_moves(h_walls, v_walls, pos0, pos1,
+                                             walls_left, mover, goals, None)
+        moves = list(move_lists[key])
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        return moves
+    
+    def plain_minimax(state, depth, mover, root, goals):
+        h_walls, v_walls, pos0, pos1, walls0, walls1 = state
+        if depth == 0:
+            my_pos, opp_pos = (pos0, pos1) if root == 0 else (pos1, pos0)
+            return ai_module._flat_score(h_walls, v_walls, my_pos, opp_pos,
+                                         goals[root], goals[1 - root]), {}
+        if pos0 % BOARD_SIZE == goals[0]:
+            return (1000 if root == 0 else -1000), {}
+        if pos1 % BOARD_SIZE == goals[1]:
+            return (1000 if root == 1 else -1000), {}
+        
+        walls_left = state[4 + mover]
+        scores = {}
+        for move in fixed_moves(h_walls, v_walls, pos0, pos1, walls_left, mover, goals, None):
+            child = list(state)
+            if move < ai_module.WALL_MOVE_BASE:
+                child[2 + mover] = move
+            else:
+                _, (x, y, orientation) = ai_module._decode_move(move)
+                child[0 if orientation == "H" else 1] |= ai_module.wall_bit(x, y)
+                child[4 + mover] -= 1
+            scores[move], _ = plain_minimax(child, depth - 1, 1 - mover, root, goals)
+        best = max(scores.values()) if mover == root else min(scores.values())
+        return best, scores
+    
+    state = ai_module._pack_state(game.state)
+    goals = tuple(p.goal_row for p in game.state.players)
+    root = game.get_current_player()
+    ai_module._ordered_moves = fixed_moves
+    try:
+        for depth in (1, 2, 3):
+            expected, root_scores = plain_minimax(state, depth, root, root, goals)
+            key = ai_module._zobrist_key(*state, root)
+            score, move = ai_module._minimax_flat(
+                *state, depth, float('-inf'), float('inf'), True, root, goals,
+                ai_module.TranspositionTable(), key, float('inf'))
+            print(f"  Depth {depth}: minimax {expected}, alpha-beta {score}")
+            assert score == expected, "Alpha-beta changed the minimax value!"
+            assert root_scores[move] == expected, "Alpha-beta picked a worse move!"
+    finally:
+        ai_module._ordered_moves = generate_moves
+    print(f"  ✅ PASSED")
+    
     print_separator()
 
 
@@ -257,14 +361,15 @@ def test_performance_benchmarks():
         print(f"\n⏱️  {difficulty.upper()} AI Performance")
         
         game = Game()
-        ai = QuoridorAI(player_index=1, difficulty=difficulty)
+        ai = _get_ai(1, difficulty)
+        ai.reset()
         game.state.current_player = 1
         
         times = []
         for _ in range(10):
-            start = time.time()
+            start = time.perf_counter_ns()
             move_type, move_data = ai.get_move(game.state)
-            elapsed = time.time() - start
+            elapsed = (time.perf_counter_ns() - start) / 1e9
             times.append(elapsed)
             
             # Execute move to change state
@@ -309,7 +414,8 @@ def test_edge_cases():
     # Test 1: No walls left
     print("\n🔍 Test 5.1: AI with No Walls Remaining")
     game = Game()
-    ai = QuoridorAI(player_index=1, difficulty="medium")
+    ai = _get_ai(1, "medium")
+    ai.reset()
     game.state.players[1].walls_left = 0
     game.state.current_player = 1
     
@@ -321,11 +427,12 @@ def test_edge_cases():
     # Test 2: Blocked on all sides except one
     print("\n🔍 Test 5.2: AI Surrounded by Walls")
     game = Game()
-    ai = QuoridorAI(player_index=0, difficulty="hard")
+    ai = _get_ai(0, "hard")
+    ai.reset()
     
     # Place walls around player 0 (at 4,0), leaving only right open
-    game.state.walls.append(("V", 3, 0))  # Left side blocked
-    game.state.walls.append(("H", 4, 0))  # Bottom blocked
+    game.force_wall("V", 3, 0)  # Left side blocked
+    game.force_wall("H", 4, 0)  # Bottom blocked
     game.state.current_player = 0
     
     move_type, move_data = ai.get_move(game.state)
@@ -339,10 +446,29 @@ def test_edge_cases():
     else:
         print(f"  ✅ PASSED - AI chose to place wall instead")
     
+    # Test 2b: Same position through the worker pool, whatever the CPU count
+    print("\n🔍 Test 5.2b: Hard AI With Parallel Search")
+    hard_workers = ai_module.HARD_WORKERS
+    ai_module.HARD_WORKERS = 2
+    ai = QuoridorAI(player_index=0, difficulty="hard")
+    try:
+        assert ai._pool is not None, "Parallel search did not start its pool!"
+        move_type, move_data = ai.get_move(game.state)
+    finally:
+        ai_module.HARD_WORKERS = hard_workers
+        ai.close()
+    print(f"  AI chose: {move_type} {move_data}")
+    if move_type == "pawn":
+        assert move_data in game.get_valid_moves_for_current_player(), "AI chose invalid move!"
+    else:
+        assert game.place_wall(*move_data), "AI chose invalid wall!"
+    print(f"  ✅ PASSED - Pooled search returned a legal move")
+    
     # Test 3: Near goal line
     print("\n🔍 Test 5.3: AI One Move From Victory")
     game = Game()
-    ai = QuoridorAI(player_index=1, difficulty="easy")
+    ai = _get_ai(1, "easy")
+    ai.reset()
     game.state.players[1].pos = (4, 1)  # One move from goal (row 0)
     game.state.current_player = 1
     
@@ -354,7 +480,19 @@ def test_edge_cases():
             print(f"  ✅ EXCELLENT - AI took winning move!")
         else:
             print(f"  ⚠️  WARNING - AI didn't take obvious win")
-    
+
+    # Test 4: Undo after a forced wall
+    print("\n🔍 Test 5.4: Undo After force_wall")
+    game = Game()
+    assert game.place_wall(0, 4, "H"), "Setup wall should be legal!"
+    game.force_wall("V", 6, 6)
+    assert game.undo(), "Undo should succeed!"
+    assert game.state.walls == {("V", 6, 6)}, "Undo removed the wrong wall!"
+    assert game.state.wall_order == [("V", 6, 6)]
+    assert game.state.h_walls == 0 and game.state.v_walls == wall_bit(6, 6)
+    assert game.state.players[0].walls_left == 10
+    print(f"  ✅ PASSED - Undo took back the placed wall only")
+
     print_separator()
 
 
@@ -377,7 +515,8 @@ def interactive_ai_demo():
         difficulty = input("Invalid! Choose easy/medium/hard: ").lower()
     
     game = Game()
-    ai = QuoridorAI(player_index=1, difficulty=difficulty)
+    ai = _get_ai(1, difficulty)
+    ai.reset()
     
     print(f"\n🤖 You're playing against {difficulty.upper()} AI")
     print("\nCommands:")
@@ -432,9 +571,9 @@ def interactive_ai_demo():
             print("AI'S TURN (Player 1)")
             print("AI is thinking...", end="", flush=True)
             
-            start = time.time()
+            start = time.perf_counter_ns()
             move_type, move_data = ai.get_move(game.state)
-            elapsed = time.time() - start
+            elapsed = (time.perf_counter_ns() - start) / 1e9
             
             print(f" ({elapsed:.2f}s)")
             
@@ -472,7 +611,7 @@ def run_all_tests():
     print("║" + "═"*58 + "║")
     print("╚" + "═"*58 + "╝")
     
-    start_time = time.time()
+    start_time = time.perf_counter_ns()
     
     try:
         test_basic_ai_functionality()
@@ -481,7 +620,7 @@ def run_all_tests():
         test_performance_benchmarks()
         test_edge_cases()
         
-        elapsed = time.time() - start_time
+        elapsed = (time.perf_counter_ns() - start_time) / 1e9
         
         print("\n" + "="*60)
         print("║" + " "*19 + "ALL TESTS PASSED! ✅" + " "*19 + "║")